@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Bytes read per duplicate check: full-scan SHA-256 vs the tiered fingerprint index.
+
+Builds a folder of sparse video files (unique random head/middle/tail, so
+they differ like real videos but take little disk space), then simulates a
+batch of downloads - some unique, some exact duplicates, some same-size
+files that only differ in the middle - and reports how many bytes each
+strategy reads per check.
+
+    python benchmarks/benchmark_dedupe.py --files 10000 --checks 50
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config'))
+
+from config import VIDEO_EXTENSIONS  # noqa: E402
+from video_processor import FileFingerprinter, ContentHashIndex  # noqa: E402
+
+MIN_SIZE = 256 * 1024
+MAX_SIZE = 8 * 1024 * 1024
+
+
+def random_size(rng):
+    return rng.randint(MIN_SIZE, MAX_SIZE)
+
+
+def make_video(path, size):
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        f.write(os.urandom(64))
+        f.seek(size // 2)
+        f.write(os.urandom(64))
+        f.seek(size - 64)
+        f.write(os.urandom(64))
+
+
+def full_scan_check(fingerprinter, folder, filepath):
+    """The original strategy: hash the new file, then every other video"""
+    new_hash = fingerprinter.full_hash(filepath)
+    for filename in os.listdir(folder):
+        if filename.endswith(VIDEO_EXTENSIONS):
+            existing_path = os.path.join(folder, filename)
+            if existing_path != filepath and fingerprinter.full_hash(existing_path) == new_hash:
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bytes read per dedupe check')
+    parser.add_argument('--files', type=int, default=10000, help='Videos already in the folder')
+    parser.add_argument('--checks', type=int, default=50, help='Simulated downloads to check')
+    parser.add_argument('--full-scan-checks', type=int, default=2,
+                        help='Checks to run with the original full-scan strategy (it is slow)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='dedupe_bench_')
+    folder = os.path.join(workdir, 'videos')
+    os.makedirs(folder)
+
+    try:
+        print(f"Creating {args.files} sparse videos in {folder}...")
+        existing = []
+        for i in range(args.files):
+            path = os.path.join(folder, f'video_{i:05d}.mp4')
+            make_video(path, random_size(rng))
+            existing.append(path)
+
+        # Mix of unique downloads, exact duplicates and same-size near-duplicates
+        downloads = []
+        for i in range(args.checks):
+            path = os.path.join(folder, f'new_{i:04d}.mp4')
+            kind = i % 3
+            if kind == 0:
+                make_video(path, random_size(rng))
+            elif kind == 1:
+                shutil.copyfile(rng.choice(existing), path)
+            else:
+                source = rng.choice(existing)
+                shutil.copyfile(source, path)
+                with open(path, 'r+b') as f:
+                    f.seek(os.path.getsize(path) // 3)
+                    f.write(b'x')
+            downloads.append((path, kind == 1))
+
+        index_file = os.path.join(workdir, 'hash_index.json')
+        index = ContentHashIndex(index_file, folders=[folder])
+
+        start = time.perf_counter()
+        index.refresh()
+        refresh_time = time.perf_counter() - start
+
+        fingerprinter = index.fingerprinter
+        per_check = []
+        start = time.perf_counter()
+        for path, expected in downloads:
+            before = fingerprinter.bytes_read
+            found = index.find_duplicate(path) is not None
+            assert found == expected, f"wrong result for {path}"
+            per_check.append(fingerprinter.bytes_read - before)
+        tiered_time = time.perf_counter() - start
+
+        scan_fp = FileFingerprinter()
+        scan_checks = downloads[:args.full_scan_checks]
+        start = time.perf_counter()
+        for path, expected in scan_checks:
+            full_scan_check(scan_fp, folder, path)
+        scan_time = time.perf_counter() - start
+
+        mb = 1024 * 1024
+        print(f"\n{'='*60}")
+        print(f"Dedupe benchmark: {args.files} videos, {args.checks} checks")
+        print(f"{'='*60}")
+        print(f"  Index refresh (stat only): {refresh_time:.2f}s, 0 bytes read")
+        print(f"  Tiered index:")
+        print(f"    Avg bytes read per check: {sum(per_check) / len(per_check) / mb:.2f} MB")
+        print(f"    Max bytes read per check: {max(per_check) / mb:.2f} MB")
+        print(f"    Avg time per check: {tiered_time / len(per_check) * 1000:.1f} ms")
+        if scan_checks:
+            print(f"  Full-scan SHA-256 (original):")
+            print(f"    Avg bytes read per check: {scan_fp.bytes_read / len(scan_checks) / mb:.2f} MB")
+            print(f"    Avg time per check: {scan_time / len(scan_checks) * 1000:.1f} ms")
+        print(f"{'='*60}\n")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Direct HTTP fast path vs yt-dlp for direct media URLs, against a local server.
+
+Serves a folder of random .mp4 files from a local HTTP/1.1 server (keep-alive
+and byte ranges supported), then downloads every file with each engine and
+reports wall time and throughput.
+
+    python benchmarks/benchmark_direct_download.py --files 20 --size-mb 8
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from direct_downloader import DirectHttpEngine  # noqa: E402
+from ytdlp_engine import ApiEngine, SubprocessEngine  # noqa: E402
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler with keep-alive and single byte-range support"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404, 'File not found')
+            return None
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        f = open(path, 'rb')
+        f.seek(start)
+        self._remaining = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        while self._remaining:
+            chunk = source.read(min(256 * 1024, self._remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            self._remaining -= len(chunk)
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # yt-dlp's generic extractor drops connections mid-body while sniffing
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def run_engine(engine, urls, output_folder, workers):
+    os.makedirs(output_folder, exist_ok=True)
+    results = []
+    lock = threading.Lock()
+    pending = list(urls)
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                url = pending.pop()
+            template = os.path.join(output_folder, f'{len(pending):04d}_%(title)s.%(ext)s')
+            returncode, error_output = engine.download(url, template)
+            with lock:
+                results.append((returncode, error_output))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    failures = [err for code, err in results if code != 0]
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark direct media downloads against a local server')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--size-mb', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--engines', default='direct,api,subprocess',
+                        help='Comma-separated engines to compare')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='direct_bench_')
+    serve_dir = os.path.join(workdir, 'serve')
+    os.makedirs(serve_dir)
+    for i in range(args.files):
+        with open(os.path.join(serve_dir, f'clip_{i:04d}.mp4'), 'wb') as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+
+    handler = lambda *a, **kw: RangeRequestHandler(*a, directory=serve_dir, **kw)  # noqa: E731
+    server = QuietServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    urls = [f'{base_url}/clip_{i:04d}.mp4' for i in range(args.files)]
+
+    engines = {
+        'direct': DirectHttpEngine(range_threshold=4 * 1024 * 1024),
+        'api': ApiEngine(),
+        'subprocess': SubprocessEngine(),
+    }
+    total_mb = args.files * args.size_mb
+
+    try:
+        print(f"\n{'='*60}")
+        print(f"Direct download benchmark: {args.files} x {args.size_mb} MB, {args.workers} workers")
+        print(f"{'='*60}")
+        for name in args.engines.split(','):
+            engine = engines[name.strip()]
+            if not engine.is_available():
+                print(f"  {name:<10} not available, skipped")
+                continue
+            # Metadata embedding needs ffmpeg and isn't what we're measuring
+            if name == 'api':
+                build_options = engine.build_options
+                engine.build_options = lambda logger: {
+                    k: v for k, v in build_options(logger).items() if k != 'postprocessors'
+                }
+            elif name == 'subprocess':
+                build_command = engine.build_command
+                engine.build_command = lambda url, template: [
+                    arg for arg in build_command(url, template) if arg != '--embed-metadata'
+                ]
+            elapsed, failures = run_engine(engine, urls, os.path.join(workdir, name), args.workers)
+            print(f"  {name:<10} {elapsed:6.2f}s  {total_mb / elapsed:8.1f} MB/s  "
+                  f"{elapsed / args.files * 1000:7.1f} ms/file  failures: {len(failures)}")
+            if failures:
+                print(f"             first error: {failures[0].strip().splitlines()[-1][:100]}")
+        print(f"{'='*60}\n")
+    finally:
+        engines['direct'].close()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
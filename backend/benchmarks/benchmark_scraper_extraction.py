@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""AsyncVideoScraper capture paths against an offline fixture.
+
+Serves a fixture (recorded with scrape_fixtures.py, or a synthetic one
+generated on the fly) through FixtureServer, so no request leaves the
+machine, and times the code the scraper runs:
+
+  - poll_new_elements (the in-page MutationObserver collector) per snapshot
+  - NetworkVideoCollector on the feed responses of each feed snapshot
+  - FeedPaginator replaying the feed request cursor by cursor
+  - a whole AsyncVideoScraper run over the feed snapshots per capture mode
+
+A synthetic fixture knows which URLs each path should find, so every row
+is also checked; the script exits with 1 if any check fails.
+
+    python benchmarks/benchmark_scraper_extraction.py --synthetic 50,500,2000
+    python benchmarks/benchmark_scraper_extraction.py --fixture fixtures/vibes --repeat 5
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config'))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+from async_scraper import AsyncVideoScraper, LEAN_VIEWPORT, USER_AGENT  # noqa: E402
+from feed_pagination import FeedPaginator  # noqa: E402
+from network_capture import NetworkVideoCollector  # noqa: E402
+from scrape_fixtures import FixtureServer, build_synthetic_fixture  # noqa: E402
+from url_index import canonical_url_key  # noqa: E402
+
+DOM_STATS_JS = "() => [document.getElementsByTagName('*').length, document.documentElement.outerHTML.length]"
+
+
+class FixtureScraper(AsyncVideoScraper):
+    """AsyncVideoScraper whose pages and replayed feed requests are answered by a FixtureServer"""
+
+    def __init__(self, fixture, **kwargs):
+        super().__init__(**kwargs)
+        self.fixture = fixture
+
+    async def _open_browser(self, p):
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(viewport=LEAN_VIEWPORT, user_agent=USER_AGENT)
+        await self.fixture.route_async(context)
+        return browser, context
+
+    def _feed_request_context(self, page):
+        return self.fixture.request_context()
+
+
+def check(found, expected):
+    """'ok', 'MISMATCH' or '-' (nothing expected: recorded fixture)"""
+    if expected is None:
+        return '-'
+    return 'ok' if {canonical_url_key(url) for url in found} == {canonical_url_key(url) for url in expected} \
+        else 'MISMATCH'
+
+
+async def bench_polling(context, fixture, scraper, repeat):
+    """poll_new_elements right after each snapshot loads (first poll scans the whole page)"""
+    rows = []
+    page = await context.new_page()
+    for name, snapshot in fixture.snapshots.items():
+        best = None
+        for _ in range(repeat):
+            await page.goto(fixture.snapshot_url(name), wait_until='domcontentloaded')
+            start = time.perf_counter()
+            videos, posts = await scraper.poll_new_elements(page)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        nodes, html_size = await page.evaluate(DOM_STATS_JS)
+        status = check(videos, snapshot.get('video_urls'))
+        if 'post_urls' in snapshot and check(posts, snapshot['post_urls']) != 'ok':
+            status = 'MISMATCH'
+        rows.append((name, snapshot['kind'], nodes, html_size, len(videos), len(posts), best, status))
+    await page.close()
+    return rows
+
+
+async def bench_network(context, fixture, feed_api_urls):
+    """NetworkVideoCollector and FeedPaginator on each feed snapshot"""
+    rows = []
+    for name, snapshot in fixture.snapshots.items():
+        if snapshot['kind'] != 'feed':
+            continue
+        fixture.reset()
+        page = await context.new_page()
+        collector = NetworkVideoCollector().attach(page)
+        paginator = FeedPaginator().attach(page)
+        await page.goto(fixture.snapshot_url(name), wait_until='domcontentloaded')
+        try:
+            await page.wait_for_load_state('networkidle', timeout=10000)
+        except Exception:
+            pass
+        captured = collector.drain()
+
+        replayed = []
+        replay_seconds = 0.0
+        if paginator.ready:
+            start = time.perf_counter()
+            await paginator.replay(fixture.request_context(), replayed.extend)
+            replay_seconds = time.perf_counter() - start
+        await page.close()
+
+        expected_first = feed_api_urls[0] if feed_api_urls else None
+        expected_rest = [url for urls in feed_api_urls[1:] for url in urls] if feed_api_urls else None
+        status = check(captured, expected_first)
+        if check(replayed, expected_rest) not in ('ok', '-'):
+            status = 'MISMATCH'
+        rows.append((name, len(captured), collector.payloads_parsed, len(replayed),
+                     paginator.pages_fetched, replay_seconds, status))
+    return rows
+
+
+async def bench_end_to_end(fixture, feed_api_urls):
+    """One AsyncVideoScraper run over every feed snapshot per capture mode"""
+    feeds = [s for s in fixture.snapshots.values() if s['kind'] == 'feed']
+    dom_urls = None
+    if all('video_urls' in s for s in feeds) and feed_api_urls:
+        dom_urls = [url for s in feeds for url in s['video_urls']]
+    expected = {
+        # Without a collector the page's own feed response isn't read, only the replayed pages
+        'dom': dom_urls + [u for urls in feed_api_urls[1:] for u in urls] if dom_urls is not None else None,
+        'network': [u for urls in feed_api_urls for u in urls] if dom_urls is not None else None,
+        'hybrid': dom_urls + [u for urls in feed_api_urls for u in urls] if dom_urls is not None else None,
+    }
+    rows = []
+    for mode in AsyncVideoScraper.CAPTURE_MODES:
+        fixture.reset()
+        scraper = FixtureScraper(
+            fixture, parallel_pages=1, headless=True, follow_posts=False, capture_mode=mode,
+            max_scroll_attempts=3, page_load_timeout=2, scroll_timeout=1, click_timeout=1
+        )
+        start = time.perf_counter()
+        urls = await scraper.scrape_async([fixture.snapshot_url(s['name']) for s in feeds], 10 ** 9)
+        rows.append((mode, len(urls), time.perf_counter() - start, check(urls, expected[mode])))
+    return rows
+
+
+async def run(fixture, repeat):
+    feed_api_urls = fixture.manifest.get('feed_api_urls')
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(viewport=LEAN_VIEWPORT, user_agent=USER_AGENT)
+        await fixture.route_async(context)
+        scraper = AsyncVideoScraper(capture_mode='hybrid')
+        polling = await bench_polling(context, fixture, scraper, repeat)
+        network = await bench_network(context, fixture, feed_api_urls)
+        await browser.close()
+    end_to_end = await bench_end_to_end(fixture, feed_api_urls)
+    return polling, network, end_to_end
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scraper capture paths against an offline fixture')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--fixture', help='Fixture folder made by scrape_fixtures.py')
+    source.add_argument('--synthetic', default='50,500,2000',
+                        help='Cards per generated feed page (used when no --fixture is given)')
+    parser.add_argument('--posts', type=int, default=20, help='Post pages in a synthetic fixture')
+    parser.add_argument('--repeat', type=int, default=3, help='Loads per snapshot when polling (best is reported)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='scrape_bench_')
+    fixture_dir = args.fixture
+    if not fixture_dir:
+        fixture_dir = os.path.join(workdir, 'fixture')
+        sizes = [int(size) for size in args.synthetic.split(',') if size]
+        build_synthetic_fixture(fixture_dir, sizes, args.posts)
+
+    fixture = FixtureServer(fixture_dir).start()
+    try:
+        wall_start = time.perf_counter()
+        polling, network, end_to_end = asyncio.run(run(fixture, args.repeat))
+        wall = time.perf_counter() - wall_start
+    finally:
+        fixture.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'='*84}")
+    print(f"Scraper capture benchmark: {len(polling)} snapshots from {args.fixture or 'synthetic fixture'}")
+    print(f"{'='*84}")
+    print("poll_new_elements (first poll after load):")
+    print(f"  {'snapshot':<14} {'kind':<5} {'DOM nodes':>10} {'HTML KB':>9} {'videos':>7} {'posts':>6} "
+          f"{'ms':>8} {'URLs/s':>9}  check")
+    for name, kind, nodes, html_size, videos, posts, seconds, status in polling:
+        rate = videos / seconds if seconds else 0
+        print(f"  {name:<14} {kind:<5} {nodes:>10} {html_size / 1024:>9.0f} {videos:>7} {posts:>6} "
+              f"{seconds * 1000:>8.1f} {rate:>9.0f}  {status}")
+    print("NetworkVideoCollector / FeedPaginator (per feed snapshot):")
+    print(f"  {'snapshot':<14} {'captured':>9} {'payloads':>9} {'replayed':>9} {'pages':>6} {'replay ms':>10}  check")
+    for name, captured, payloads, replayed, pages, seconds, status in network:
+        print(f"  {name:<14} {captured:>9} {payloads:>9} {replayed:>9} {pages:>6} {seconds * 1000:>10.1f}  {status}")
+    print("AsyncVideoScraper run over the feed snapshots:")
+    print(f"  {'mode':<14} {'URLs':>9} {'seconds':>9}  check")
+    for mode, urls, seconds, status in end_to_end:
+        print(f"  {mode:<14} {urls:>9} {seconds:>9.2f}  {status}")
+    print(f"  Requests served from fixture: {fixture.hits}, blocked: {fixture.misses}")
+    print(f"  Wall time: {wall:.2f}s")
+    print(f"{'='*84}\n")
+
+    statuses = [row[-1] for row in polling + network + end_to_end]
+    if 'MISMATCH' in statuses:
+        print(f"❌ {statuses.count('MISMATCH')} check(s) found different URLs than the fixture holds")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Startup cost of main.py per mode.
+
+Each mode runs in a fresh interpreter (python -X importtime) that imports
+main, creates VideoAutomationSystem and builds what that mode needs,
+without doing the work itself (no browser, no downloads, no uploads);
+status and export are cheap, so those run for real. It runs in a scratch
+folder, so the databases it touches are empty. Reports wall time (best of
+--repeat), total import time, modules loaded and the heaviest imports.
+
+    python benchmarks/benchmark_startup.py
+    python benchmarks/benchmark_startup.py --modes status,full --repeat 10
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# What each mode loads before it starts working
+MODES = {
+    'status': "system.show_status()",
+    'export': "system.export_urls('urls.csv')",
+    'scrape': "system.scraper; import async_scraper",
+    'download': "system.downloader",
+    'schedule': "system.uploader; import schedule, googleapiclient.discovery, google_auth_oauthlib.flow",
+    'full': ("system.scraper; import async_scraper; system.downloader; system.uploader; "
+             "import schedule, googleapiclient.discovery, google_auth_oauthlib.flow"),
+}
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def time_bare_interpreter(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=env)
+    return time.perf_counter() - start
+
+
+def run_mode(setup, workdir, env):
+    """(wall seconds, [(module, cumulative us, depth)]) for one fresh interpreter"""
+    code = f"import main\nsystem = main.VideoAutomationSystem()\n{setup}\n"
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(2)), len(match.group(3)) // 2))
+    return wall, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark main.py startup per mode')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to time')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per mode (best is reported)')
+    parser.add_argument('--top', type=int, default=3, help='Heaviest imports to list per mode')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.join(BACKEND_DIR, 'src'), os.path.join(BACKEND_DIR, 'config')]
+        + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else [])
+    )
+    workdir = tempfile.mkdtemp(prefix='startup_bench_')
+
+    # Bare interpreter start, for reference
+    baseline = min(time_bare_interpreter(env) for _ in range(args.repeat))
+
+    rows = []
+    try:
+        for mode in [m for m in args.modes.split(',') if m]:
+            if mode not in MODES:
+                print(f"Unknown mode '{mode}' (choose from: {', '.join(MODES)})")
+                continue
+            best_wall, best_imports = None, None
+            for _ in range(args.repeat):
+                wall, imports = run_mode(MODES[mode], workdir, env)
+                if best_wall is None or wall < best_wall:
+                    best_wall, best_imports = wall, imports
+            top_level = sorted((i for i in best_imports if i[2] == 0), key=lambda i: -i[1])
+            import_ms = sum(i[1] for i in top_level) / 1000
+            heaviest = ', '.join(f"{name} {us / 1000:.0f}ms" for name, us, _ in top_level[:args.top])
+            rows.append((mode, best_wall, import_ms, len(best_imports), heaviest))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{'='*78}")
+    print(f"main.py startup benchmark (best of {args.repeat}, bare interpreter: {baseline * 1000:.0f}ms)")
+    print(f"{'='*78}")
+    print(f"  {'mode':<10} {'wall ms':>8} {'import ms':>10} {'modules':>8}  heaviest imports")
+    for mode, wall, import_ms, modules, heaviest in rows:
+        print(f"  {mode:<10} {wall * 1000:>8.0f} {import_ms:>10.0f} {modules:>8}  {heaviest}")
+    print(f"{'='*78}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,24 @@
 META_AI_START_URL = "https://www.meta.ai/vibes"
 NUM_VIDEOS_TO_SCRAPE = 20
-SCRAPER_HEADLESS = False
+SCRAPER_HEADLESS = True
+SCRAPER_LEAN = True  # Block images, fonts, trackers and video bodies; smaller viewport
+# Keep one browser running between scrapes (stop it with: python browser_pool.py stop).
+# Its DevTools endpoint on 127.0.0.1 has no authentication and stays up after
+# the run, so any local process can drive it; turn this off on shared machines
+SCRAPER_WARM_BROWSER = True
+SCRAPER_BROWSER_PROFILE = 'browser_profile'  # Persistent user-data dir (cookies, cache)
+SCRAPER_BROWSER_PORT = 9222  # DevTools port; a free one is used if something else holds it
+SCRAPER_BROWSER_MAX_PAGES = 500  # Restart the browser after this many page loads
+SCRAPER_BROWSER_MAX_MEMORY_MB = 1500  # ... or once it uses this much memory
+# Scraped URLs are remembered by canonical key in DOWNLOAD_LOG_DB; a Bloom
+# filter sized for this many keys skips the lookup for unseen ones (None: off)
+SCRAPER_SEEN_BLOOM_CAPACITY = 1000000
+SCRAPER_START_URLS = []  # Extra feed sections crawled alongside META_AI_START_URL
+SCRAPER_PARALLEL_PAGES = 4  # Browser pages crawling at once
+SCRAPER_FOLLOW_POSTS = True  # Visit post links found on the feed with the other pages
+SCRAPER_CAPTURE_MODE = 'hybrid'  # 'network' (responses only), 'hybrid' (+ element scan) or 'dom'
+SCRAPER_PAGINATION = 'replay'  # Replay the feed's pagination request; 'scroll' to only scroll
+SCRAPER_MAX_IDLE_POLLS = 3  # Stop scrolling a page after this many polls with nothing new
 
 UPLOAD_TIMES = [
     '14:00',
@@ -54,17 +72,40 @@ EVERGREEN_HASHTAGS = [
 ]
 
 VIDEOS_FOLDER = 'videos'
+# Files the downloader, uploader, dedupe index, status view and network capture treat as videos
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.3gp')
 UPLOADED_FOLDER = 'uploaded'
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.pickle'
-URLS_FILE = 'video_urls.xlsx'
+URLS_FILE = 'video_urls.xlsx'  # Old URL list; new rows are imported into DOWNLOAD_LOG_DB
+HASH_INDEX_FILE = 'hash_index.json'
+DOWNLOAD_LOG_DB = 'downloaded_log.db'
+URLS_EXPORT_FILE = 'video_urls_export.xlsx'  # Spreadsheet view written by --mode export
 
 UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_PARALLEL = 3  # Videos uploaded at once by the video scheduler (1 = one after another)
+# Longest the scraper waits for new content after loading, scrolling or clicking (seconds)
 SCRAPER_PAGE_LOAD_DELAY = 3
 SCRAPER_SCROLL_DELAY = 2
 SCRAPER_CLICK_DELAY = 1
 SCHEDULER_CHECK_INTERVAL = 30
 
+DOWNLOAD_MAX_WORKERS = 8
+DOWNLOAD_PER_HOST_LIMIT = 4
+DOWNLOAD_ENGINE = 'auto'  # 'api' (in-process yt-dlp), 'subprocess' or 'auto'
+DIRECT_DOWNLOADS = True  # Fetch direct .mp4/.webm CDN links over HTTP without yt-dlp
+DOWNLOAD_STALL_TIMEOUT = 60  # Abort a yt-dlp download (either engine) that makes no progress for this many seconds
+DOWNLOAD_RATE_PER_HOST = 2.0  # Requests per second per host (token bucket)
+DOWNLOAD_BURST_PER_HOST = 4
+DOWNLOAD_MAX_RETRIES = 2  # Retries for transient / rate-limited failures
+DOWNLOAD_BACKOFF_BASE = 5  # Seconds, doubled per retry with jitter
+DOWNLOAD_BACKOFF_MAX = 300
+CIRCUIT_BREAKER_THRESHOLD = 3  # Consecutive 403/429s before a host is paused
+CIRCUIT_BREAKER_COOLDOWN = 300  # Seconds a host stays paused
+DOWNLOAD_LEASE_SECONDS = 600  # Queue lease; a crashed run's jobs are picked up again after this
+DOWNLOAD_RETRY_BUDGET = 3  # Runs a transiently failing URL gets before it is dead-lettered
+DOWNLOAD_EXPIRY_MARGIN = 120  # Skip signed CDN links that expire within this many seconds
+
 DESCRIPTION_TEMPLATE = """🔥 YOU WON'T BELIEVE WHAT HAPPENS NEXT! 🔥
 
 🚀 This video is breaking the internet! Watch till the end for the most INCREDIBLE moment!
@@ -0,0 +1,398 @@
+import time
+import asyncio
+from urllib.parse import urljoin, urlparse
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+
+from feed_pagination import FeedPaginator
+from network_capture import FEED_URL_HINTS, NetworkVideoCollector
+from resource_blocking import ResourceBlocker
+from url_index import canonical_url_key
+from video_scraper import find_video_urls_in_html
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+VIEWPORT = {'width': 1280, 'height': 720}
+LEAN_VIEWPORT = {'width': 800, 'height': 600}
+
+MEDIA_SELECTOR = 'video, [data-video-url], [data-src]'
+
+# True once the incremental collector has something the last poll didn't return
+NEW_ELEMENTS_JS = """() => {
+    const c = window.__videoCollector;
+    return !!c && (c.videos.length > 0 || c.posts.length > 0);
+}"""
+
+# Installed once per document: scans the page, then a MutationObserver scans
+# only added subtrees and changed src/href attributes. Each call returns the
+# video sources and post links seen since the previous call.
+INCREMENTAL_COLLECTOR_JS = """() => {
+    let c = window.__videoCollector;
+    if (!c) {
+        c = window.__videoCollector = {videos: [], posts: [], seen: new Set()};
+        const VIDEO_SEL = 'video, [data-video-url], [data-src]';
+        const POST_SEL = 'a[href*="/post/"]';
+        const push = (list, value) => {
+            if (value && !c.seen.has(value)) { c.seen.add(value); list.push(value); }
+        };
+        const take = (el) => {
+            if (el.matches(VIDEO_SEL)) {
+                push(c.videos, el.tagName === 'VIDEO' ? el.getAttribute('src')
+                    : el.getAttribute('data-video-url') || el.getAttribute('data-src'));
+            }
+            if (el.matches(POST_SEL)) push(c.posts, el.href);
+        };
+        const scan = (root) => {
+            if (root.nodeType !== 1) return;
+            take(root);
+            for (const el of root.querySelectorAll(VIDEO_SEL + ', ' + POST_SEL)) take(el);
+        };
+        scan(document.documentElement);
+        new MutationObserver((records) => {
+            for (const record of records) {
+                if (record.type === 'attributes') take(record.target);
+                else for (const node of record.addedNodes) scan(node);
+            }
+        }).observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true,
+            attributeFilter: ['src', 'href', 'data-src', 'data-video-url']
+        });
+    }
+    const fresh = {videos: c.videos, posts: c.posts};
+    c.videos = [];
+    c.posts = [];
+    return fresh;
+}"""
+
+
+class ScrapeResults:
+    """De-duplicated URL set shared by all crawling pages.
+
+    URLs are compared by canonical key, both among themselves and against
+    seen_keys (a set of keys or a SeenIndex from earlier runs). Stops
+    accepting URLs once target is reached and sets done, which every page
+    checks between steps.
+    """
+
+    def __init__(self, target, seen_keys=()):
+        self.target = target
+        self.urls = []
+        self._seen = set()
+        self._known = seen_keys
+        self.done = asyncio.Event()
+        if target <= 0:
+            self.done.set()
+
+    @property
+    def full(self):
+        return self.done.is_set()
+
+    def add(self, url):
+        if self.full:
+            return False
+        key = canonical_url_key(url)
+        if key in self._seen or key in self._known:
+            return False
+        self._seen.add(key)
+        self.urls.append(url)
+        if len(self.urls) >= self.target:
+            self.done.set()
+        return True
+
+
+class AsyncVideoScraper:
+    """Crawls several feed pages at once with async Playwright.
+
+    Each of the parallel_pages workers takes URLs from a shared frontier and
+    adds what it finds to one ScrapeResults; the run stops at num_videos.
+    """
+
+    CAPTURE_MODES = ('dom', 'network', 'hybrid')
+
+    def __init__(self, parallel_pages=4, headless=False, max_scroll_attempts=20, follow_posts=True,
+                 page_load_timeout=5, scroll_timeout=4, click_timeout=3, capture_mode='hybrid',
+                 pagination='replay', max_idle_polls=3, lean=True, browser_service=None):
+        if capture_mode not in self.CAPTURE_MODES:
+            raise ValueError(f"capture_mode must be one of {self.CAPTURE_MODES}, got {capture_mode!r}")
+        self.capture_mode = capture_mode
+        self.pagination = pagination
+        self.parallel_pages = max(1, int(parallel_pages))
+        self.headless = headless
+        self.max_scroll_attempts = max_scroll_attempts
+        self.follow_posts = follow_posts
+        self.page_load_timeout = page_load_timeout
+        self.scroll_timeout = scroll_timeout
+        self.click_timeout = click_timeout
+        self.wait_stats = {}
+        self.max_idle_polls = max_idle_polls
+        self.lean = lean
+        self.blocker = None
+        self.browser_service = browser_service
+
+    def scrape(self, start_urls, num_videos, seen_keys=()):
+        """Blocking entry point; returns the list of new video URLs"""
+        return asyncio.run(self.scrape_async(start_urls, num_videos, seen_keys))
+
+    async def scrape_async(self, start_urls, num_videos, seen_keys=()):
+        results = ScrapeResults(num_videos, seen_keys)
+        frontier = asyncio.Queue()
+        self._visited = set()
+        self.wait_stats = {}
+        self.blocker = ResourceBlocker() if self.lean else None
+        self.pages_loaded = 0
+        for url in start_urls:
+            self._enqueue(frontier, url, self.max_scroll_attempts)
+
+        # Feeds are crawled in parallel; extra pages only help when posts are followed
+        page_count = self.parallel_pages if self.follow_posts else min(self.parallel_pages, len(start_urls))
+
+        async with async_playwright() as p:
+            browser, shared_context = await self._open_browser(p)
+            workers = [
+                asyncio.ensure_future(self._worker(browser, shared_context, frontier, results, i + 1))
+                for i in range(max(1, page_count))
+            ]
+            waiters = [
+                asyncio.ensure_future(frontier.join()),
+                asyncio.ensure_future(results.done.wait()),
+                # Only finishes early if every page failed to start
+                asyncio.gather(*workers, return_exceptions=True),
+            ]
+            try:
+                # Done when the target is reached or every queued page is crawled
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in waiters + workers:
+                    task.cancel()
+                await asyncio.gather(*waiters, return_exceptions=True)
+                for result in await asyncio.gather(*workers, return_exceptions=True):
+                    if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                        print(f"  ✗ Scraper page failed: {result}")
+                # Only disconnects from a warm browser
+                await browser.close()
+                if self.browser_service:
+                    self.browser_service.record_pages(self.pages_loaded)
+        self._print_wait_stats()
+        if self.blocker and self.blocker.blocked:
+            print(f"  Blocked requests: {self.blocker.summary()}")
+        return results.urls
+
+    def _print_wait_stats(self):
+        if self.wait_stats:
+            print("  Time spent waiting: " + ', '.join(
+                f"{phase} {seconds:.1f}s over {count}"
+                for phase, (seconds, count) in self.wait_stats.items()
+            ))
+
+    async def _open_browser(self, p):
+        """(browser, shared context or None).
+
+        With a browser_service the run attaches to the warm browser over CDP
+        and every page shares its persistent context, cookies and cache.
+        """
+        if not self.browser_service:
+            return await p.chromium.launch(headless=self.headless), None
+        endpoint = await asyncio.to_thread(
+            self.browser_service.ensure_running, p.chromium.executable_path, USER_AGENT
+        )
+        browser = await p.chromium.connect_over_cdp(endpoint)
+        return browser, browser.contexts[0]
+
+    def _enqueue(self, frontier, url, scroll_attempts):
+        if url in self._visited:
+            return
+        self._visited.add(url)
+        frontier.put_nowait((url, scroll_attempts))
+
+    async def _worker(self, browser, shared_context, frontier, results, worker_id):
+        """One page crawling frontier URLs; with lean, a ResourceBlocker drops
+        images, fonts, trackers and video bodies and the viewport is smaller"""
+        viewport = LEAN_VIEWPORT if self.lean else VIEWPORT
+        if shared_context:
+            context = shared_context
+            page = await context.new_page()
+            await page.set_viewport_size(viewport)
+        else:
+            context = await browser.new_context(viewport=viewport, user_agent=USER_AGENT)
+            page = await context.new_page()
+        collector = NetworkVideoCollector().attach(page) if self.capture_mode != 'dom' else None
+        if self.blocker:
+            await self.blocker.attach(page, on_media=collector.add_media_url if collector else None)
+        paginator = FeedPaginator().attach(page) if self.pagination == 'replay' else None
+        try:
+            while True:
+                url, scroll_attempts = await frontier.get()
+                try:
+                    if not results.full:
+                        await self._crawl(page, collector, paginator, url, scroll_attempts,
+                                          frontier, results, worker_id)
+                except PlaywrightTimeout:
+                    print(f"  [page {worker_id}] ✗ Page load timeout: {url[:60]}")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"  [page {worker_id}] ✗ Error crawling {url[:60]}: {e}")
+                finally:
+                    frontier.task_done()
+        finally:
+            # The warm browser's context outlives the run; only our page goes
+            await (page.close() if shared_context else context.close())
+
+    async def _crawl(self, page, collector, paginator, url, scroll_attempts, frontier, results, worker_id):
+        """Load url and poll it, scrolling up to scroll_attempts times.
+
+        A page is left after max_idle_polls polls in a row find nothing. With
+        pagination='replay' it is only scrolled until it sends its own feed
+        request, which _replay_feed then takes over.
+        """
+        print(f"  [page {worker_id}] Loading {url[:70]}")
+        if paginator:
+            paginator.reset()
+        self.pages_loaded += 1
+        await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+        # Wait for dynamic content
+        await self._wait_for('load', self.page_load_timeout, [
+            page.wait_for_load_state('networkidle', timeout=self.page_load_timeout * 1000),
+            page.wait_for_selector(MEDIA_SELECTOR, state='attached', timeout=self.page_load_timeout * 1000),
+            self._feed_response(page, self.page_load_timeout),
+        ])
+
+        attempt = idle_polls = 0
+        while not results.full:
+            video_urls, post_urls = await self._collect(page, collector)
+            added = sum(results.add(video_url) for video_url in video_urls)
+            if self.follow_posts:
+                for post_url in post_urls:
+                    self._enqueue(frontier, post_url, 0)
+            print(f"  [page {worker_id}] +{added} new, {len(results.urls)}/{results.target} total "
+                  f"(scroll {attempt}/{scroll_attempts})")
+
+            idle_polls = 0 if video_urls or post_urls else idle_polls + 1
+            if attempt >= scroll_attempts or results.full:
+                break
+            if idle_polls >= self.max_idle_polls:
+                print(f"  [page {worker_id}] Nothing new in {idle_polls} polls in a row, moving on")
+                break
+            if paginator and paginator.ready:
+                if await self._replay_feed(page, paginator, results, worker_id):
+                    break
+            await self._scroll(page, worker_id)
+            attempt += 1
+
+    async def _replay_feed(self, page, paginator, results, worker_id):
+        """Fetch the feed cursor by cursor with the page's own pagination request.
+
+        Returns True when the feed is exhausted or the target is reached;
+        on failure the paginator is disabled and the page goes back to scrolling.
+        """
+        print(f"  [page {worker_id}] Replaying the feed's pagination request instead of scrolling")
+        added = []
+
+        def on_urls(urls):
+            added.extend(url for url in urls if results.add(url))
+
+        try:
+            ok = await paginator.replay(self._feed_request_context(page), on_urls, lambda: results.full)
+        except Exception as e:
+            print(f"  [page {worker_id}] Feed replay failed ({e}), falling back to scrolling")
+            paginator.disabled = True
+            ok = False
+        print(f"  [page {worker_id}] +{len(added)} new from {paginator.pages_fetched} feed page(s), "
+              f"{len(results.urls)}/{results.target} total")
+        return ok
+
+    def _feed_request_context(self, page):
+        """Where replayed feed requests go: the page's context, so they carry its cookies"""
+        return page.context.request
+
+    async def _scroll(self, page, worker_id):
+        """Scroll once and click any "Load more" buttons, each followed by a
+        wait for new media or a feed response instead of a fixed sleep"""
+        try:
+            await page.evaluate('window.scrollBy(0, 1200)')
+            await self._wait_for_new_content(page, 'scroll', self.scroll_timeout)
+
+            # Try clicking "Load more" or similar buttons if they exist
+            buttons = await page.query_selector_all(
+                'button:has-text("Load"), button:has-text("More"), [aria-label*="Load"]'
+            )
+            for button in buttons:
+                try:
+                    await button.click()
+                    await self._wait_for_new_content(page, 'click', self.click_timeout)
+                except Exception:
+                    pass
+        except Exception as e:
+            print(f"  [page {worker_id}] Warning: Scroll error: {e}")
+
+    async def _wait_for_new_content(self, page, phase, timeout):
+        await self._wait_for(phase, timeout, [
+            page.wait_for_function(NEW_ELEMENTS_JS, timeout=timeout * 1000),
+            self._feed_response(page, timeout),
+        ])
+
+    def _feed_response(self, page, timeout):
+        return page.wait_for_event(
+            'response',
+            lambda response: any(hint in response.url.lower() for hint in FEED_URL_HINTS),
+            timeout=timeout * 1000
+        )
+
+    async def _wait_for(self, phase, timeout, signals):
+        """Wait until one of signals (network idle, new media, a feed response)
+        succeeds or timeout seconds pass; the time spent is added to wait_stats[phase]"""
+        started = time.monotonic()
+        pending = {asyncio.ensure_future(signal) for signal in signals}
+        try:
+            while pending:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                # A signal that errored (e.g. timed out) doesn't count
+                if any(not task.cancelled() and task.exception() is None for task in done):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            seconds, count = self.wait_stats.get(phase, (0.0, 0))
+            self.wait_stats[phase] = (seconds + time.monotonic() - started, count + 1)
+
+    async def _collect(self, page, collector):
+        """(video URLs, post links) that appeared since the previous poll.
+
+        capture_mode 'network' only takes media requests and feed JSON from
+        the collector, 'hybrid' adds the element scan, and 'dom' also runs
+        the regexes over the serialized page.
+        """
+        urls = collector.drain() if collector else []
+        videos, posts = await self.poll_new_elements(page)
+        if self.capture_mode != 'network':
+            urls.extend(videos)
+        if self.capture_mode == 'dom':
+            try:
+                find_video_urls_in_html(await page.content(), urls)
+            except Exception as e:
+                print(f"  Error extracting video URLs: {e}")
+        return urls, posts
+
+    async def poll_new_elements(self, page):
+        """New video sources and same-host post links, in one evaluate call.
+
+        A MutationObserver installed on the first poll collects added elements,
+        so each poll only costs as much as the content added since the last one.
+        """
+        try:
+            fresh = await page.evaluate(INCREMENTAL_COLLECTOR_JS)
+        except Exception as e:
+            print(f"  Error extracting video URLs: {e}")
+            return [], []
+        videos = [u for u in fresh['videos'] if u.startswith('http') and not u.startswith('blob:')]
+        host = urlparse(page.url).netloc
+        posts = [
+            urljoin(page.url, href).split('#')[0] for href in fresh['posts']
+            if href and urlparse(urljoin(page.url, href)).netloc == host
+        ]
+        return videos, posts
@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+from urllib.request import urlopen
+
+
+def _process_tree_rss_mb(pid):
+    """Resident memory of pid and its descendants in MB (Linux only, else None)"""
+    if not os.path.isdir('/proc'):
+        return None
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Field 4 is the parent pid; the name in field 2 may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024 if total_kb else None
+
+
+class BrowserService:
+    """A long-lived Chromium that scrape runs attach to over CDP.
+
+    The browser is started detached with a persistent user-data dir, so it
+    outlives the scrape process and keeps its cookies and cache; the next
+    run finds it through a state file in that dir and its DevTools
+    endpoint instead of paying a cold start. The state file records the
+    browser's WebSocket debugger URL, so only that browser is reused, not
+    whatever else answers on the port. Before each run the endpoint is
+    health-checked, and the browser is restarted if it stopped answering,
+    has loaded max_pages pages, or its process tree uses more than
+    max_memory_mb.
+
+    The DevTools endpoint listens on 127.0.0.1 without authentication and
+    stays up after the run, so any local process can drive the browser
+    (and its logged-in profile) until it is stopped.
+    """
+
+    STATE_FILE = 'browser_service.json'
+    # Written by Chrome into the user-data dir: the DevTools port, then the browser's WebSocket path
+    ACTIVE_PORT_FILE = 'DevToolsActivePort'
+
+    def __init__(self, user_data_dir='browser_profile', port=9222, headless=True,
+                 max_pages=500, max_memory_mb=1500):
+        self.user_data_dir = os.path.abspath(user_data_dir)
+        self.port = port
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+
+    @property
+    def endpoint(self):
+        return self._endpoint(self.load_state().get('port') or self.port)
+
+    def _endpoint(self, port):
+        return f'http://127.0.0.1:{port}'
+
+    @property
+    def state_file(self):
+        return os.path.join(self.user_data_dir, self.STATE_FILE)
+
+    def load_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f)
+
+    def _version(self, port, timeout=2):
+        """/json/version of whatever answers on port, or None"""
+        try:
+            with urlopen(self._endpoint(port) + '/json/version', timeout=timeout) as response:
+                return json.load(response) if response.status == 200 else None
+        except Exception:
+            return None
+
+    def is_healthy(self, timeout=2, state=None):
+        """True if the browser this service started answers on its port"""
+        state = state if state is not None else self.load_state()
+        if not state.get('ws_url'):
+            return False
+        version = self._version(state.get('port') or self.port, timeout)
+        return bool(version) and version.get('webSocketDebuggerUrl') == state['ws_url']
+
+    def owns_process(self, state):
+        """True if state's pid is still the browser this service launched.
+
+        After a reboot or crash the pid may belong to something else, so it
+        is only signalled if its command line has this profile's
+        --user-data-dir and a DevTools port (or, without /proc, if the
+        recorded endpoint still answers).
+        """
+        pid = state.get('pid')
+        if not pid:
+            return False
+        if not os.path.isdir('/proc'):
+            return self.is_healthy(timeout=0.5, state=state)
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                args = f.read().decode('utf-8', 'replace').split('\0')
+        except OSError:
+            return False
+        return (f'--user-data-dir={self.user_data_dir}' in args
+                and any(arg.startswith('--remote-debugging-port=') for arg in args))
+
+    def memory_mb(self, state=None):
+        pid = (state or self.load_state()).get('pid')
+        return _process_tree_rss_mb(pid) if pid else None
+
+    def recycle_reason(self, state):
+        pages = state.get('pages', 0)
+        if self.max_pages and pages >= self.max_pages:
+            return f"served {pages} pages"
+        memory = self.memory_mb(state)
+        if self.max_memory_mb and memory and memory > self.max_memory_mb:
+            return f"using {memory:.0f} MB"
+        return None
+
+    def ensure_running(self, executable_path, user_agent=None):
+        """DevTools endpoint of a healthy browser, starting or recycling it as needed"""
+        state = self.load_state()
+        if self.is_healthy(state=state):
+            reason = self.recycle_reason(state)
+            if not reason:
+                print(f"♻️  Reusing warm browser (pid {state.get('pid', '?')}, "
+                      f"{state.get('pages', 0)} pages served)")
+                if state.get('headless', self.headless) != self.headless:
+                    mode = 'headless' if state['headless'] else 'headed'
+                    print(f"  Note: the warm browser is running {mode}; stop it "
+                          f"(python browser_pool.py stop) to switch modes")
+                return self.endpoint
+            print(f"🔄 Recycling browser: {reason}")
+            self.stop()
+        elif state.get('pid'):
+            if self.owns_process(state):
+                print("⚠ Browser service is not responding, restarting it")
+                self.stop()
+            else:
+                # Stale state (reboot, crash): the pid is not our browser any more
+                self._clear_state()
+        self._launch(executable_path, user_agent)
+        return self.endpoint
+
+    def _launch(self, executable_path, user_agent):
+        port = self.port
+        if port and self._version(port, timeout=1):
+            print(f"⚠ Port {port} is taken by another DevTools endpoint, using a free one")
+            port = 0
+        active_port_file = os.path.join(self.user_data_dir, self.ACTIVE_PORT_FILE)
+        try:
+            os.remove(active_port_file)
+        except OSError:
+            pass
+
+        args = [
+            executable_path,
+            f'--remote-debugging-port={port}',
+            '--remote-debugging-address=127.0.0.1',
+            f'--user-data-dir={self.user_data_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--mute-audio',
+        ]
+        if self.headless:
+            args.append('--headless=new')
+        if user_agent:
+            args.append(f'--user-agent={user_agent}')
+        args.append('about:blank')
+
+        # Detached so the browser survives this process
+        kwargs = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        process = subprocess.Popen(args, **kwargs)
+        self._save_state({'pid': process.pid, 'port': port, 'pages': 0, 'started_at': time.time()})
+
+        deadline = time.time() + 20
+        while time.time() < deadline:
+            # The port and WebSocket path come from the browser itself, so the
+            # endpoint saved below is known to be this process's
+            try:
+                with open(active_port_file) as f:
+                    active_port, ws_path = f.read().split()[:2]
+            except (OSError, ValueError):
+                active_port = ws_path = None
+            version = self._version(active_port, timeout=1) if active_port else None
+            ws_url = version.get('webSocketDebuggerUrl', '') if version else ''
+            if ws_path and ws_url.endswith(ws_path):
+                self._save_state({'pid': process.pid, 'port': int(active_port), 'ws_url': ws_url,
+                                  'headless': self.headless, 'pages': 0, 'started_at': time.time()})
+                print(f"🚀 Started browser service (pid {process.pid}, port {active_port}, "
+                      f"profile {self.user_data_dir}); stop it with: python browser_pool.py stop")
+                return
+            if process.poll() is not None:
+                self._clear_state()
+                raise RuntimeError(f"Browser exited on startup with code {process.returncode}")
+            time.sleep(0.25)
+        self.stop()
+        raise RuntimeError("Browser service did not open its DevTools endpoint")
+
+    def record_pages(self, count):
+        state = self.load_state()
+        if state:
+            state['pages'] = state.get('pages', 0) + count
+            self._save_state(state)
+
+    def stop(self):
+        state = self.load_state()
+        pid = state.get('pid')
+        if pid and self.owns_process(state):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+            deadline = time.time() + 10
+            while time.time() < deadline and self.is_healthy(timeout=0.5, state=state):
+                time.sleep(0.25)
+            if self.is_healthy(timeout=0.5, state=state) and os.name != 'nt':
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+        self._clear_state()
+
+    def _clear_state(self):
+        try:
+            os.remove(self.state_file)
+        except OSError:
+            pass
+
+
+def main():
+    import config
+    parser = argparse.ArgumentParser(description='Manage the warm scraper browser')
+    parser.add_argument('action', choices=['status', 'stop'])
+    args = parser.parse_args()
+
+    service = BrowserService(
+        user_data_dir=config.SCRAPER_BROWSER_PROFILE,
+        port=config.SCRAPER_BROWSER_PORT
+    )
+    if args.action == 'stop':
+        service.stop()
+        print("✓ Browser service stopped")
+        return
+    state = service.load_state()
+    if not service.is_healthy(state=state):
+        print("Browser service is not running")
+        sys.exit(1)
+    memory = service.memory_mb(state)
+    print(f"Browser service at {service.endpoint}")
+    print(f"  pid: {state.get('pid', '?')}")
+    print(f"  pages served: {state.get('pages', 0)}")
+    if memory:
+        print(f"  memory: {memory:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
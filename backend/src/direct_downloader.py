@@ -0,0 +1,359 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from urllib.parse import urlparse, unquote
+
+from progress import make_event
+from url_expiry import is_expired
+from ytdlp_engine import YTDLP_HEADERS
+
+DIRECT_MEDIA_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.webm', '.mkv')
+
+# Bytes of a 4xx response body kept in the error message for classification
+ERROR_BODY_BYTES = 512
+
+
+def is_direct_media_url(url):
+    """True for plain http(s) links straight to a media file (e.g. CDN .mp4 URLs)"""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return False
+    return parsed.scheme in ('http', 'https') and parsed.path.lower().endswith(DIRECT_MEDIA_EXTENSIONS)
+
+
+class DirectDownloadError(Exception):
+    pass
+
+
+class _RangeNotSupported(Exception):
+    pass
+
+
+class _TransferProgress:
+    """Publishes throttled progress events for one direct download"""
+
+    def __init__(self, progress_bus, url, total_bytes, interval=0.5):
+        self.progress_bus = progress_bus
+        self.url = url
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.downloaded = 0
+        self.started = time.monotonic()
+        self._last_publish = 0
+
+    def add(self, n):
+        self.downloaded += n
+        now = time.monotonic()
+        if now - self._last_publish >= self.interval:
+            self._last_publish = now
+            self._publish('downloading')
+
+    def finish(self):
+        self._publish('finished')
+
+    def _publish(self, status):
+        if not self.progress_bus:
+            return
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        speed = self.downloaded / elapsed
+        eta = None
+        if self.total_bytes and speed and status == 'downloading':
+            eta = (self.total_bytes - self.downloaded) / speed
+        self.progress_bus.publish(make_event(self.url, DirectHttpEngine.name, {
+            'status': status,
+            'downloaded_bytes': self.downloaded,
+            'total_bytes': self.total_bytes,
+            'speed': speed,
+            'eta': eta,
+        }))
+
+
+class DirectHttpEngine:
+    """Downloads direct media URLs with a pooled keep-alive aiohttp client.
+
+    Has the same download(url, output_template) -> (returncode, error_output)
+    interface as the yt-dlp engines, so VideoProcessor can route direct
+    links here and keep its naming, logging and duplicate checks. Files are
+    streamed to a .part file and renamed when complete. The SHA-256 is
+    computed while downloading and handed to on_complete(path, sha256).
+    Large files that support byte ranges are fetched in parallel parts, and
+    each part is hashed in order as soon as it lands.
+
+    A failed or interrupted download keeps its .part file; the next attempt
+    at the same path continues from it with a Range request (ranged
+    downloads track per-part progress in a .part.ranges file).
+
+    One event loop runs in a background thread and owns the session, so
+    calls from several worker threads share one connection pool.
+    """
+
+    name = 'direct'
+
+    def __init__(self, max_connections=16, range_threshold=16 * 1024 * 1024, range_parts=4,
+                 chunk_size=256 * 1024, on_complete=None, progress_bus=None):
+        self.max_connections = max_connections
+        self.range_threshold = range_threshold
+        self.range_parts = range_parts
+        self.chunk_size = chunk_size
+        self.on_complete = on_complete
+        self.progress_bus = progress_bus
+        self._loop = None
+        self._session = None
+        self._start_lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import aiohttp  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def handles(self, url):
+        return is_direct_media_url(url) and self.is_available()
+
+    def build_path(self, url, output_template):
+        # Mirror yt-dlp's generic extractor: title is the file name, ext its extension
+        name = unquote(os.path.basename(urlparse(url).path))
+        title, ext = os.path.splitext(name)
+        title = re.sub(r'[<>:"/\\|?*]', '', title).strip() or 'video'
+        return output_template.replace('%(title)s', title).replace('%(ext)s', ext.lstrip('.').lower() or 'mp4')
+
+    def download(self, url, output_template):
+        """Returns (returncode, error_output)"""
+        path = self.build_path(url, output_template)
+        future = asyncio.run_coroutine_threadsafe(self._download(url, path), self._ensure_loop())
+        try:
+            sha256 = future.result()
+        except DirectDownloadError as e:
+            return 1, f'ERROR: {e}'
+        except Exception as e:
+            return 1, f'ERROR: {type(e).__name__}: {e}'
+        if self.on_complete:
+            self.on_complete(path, sha256)
+        return 0, ''
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='direct-http', daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=30,
+                ssl=False  # Same as yt-dlp's --no-check-certificates
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=YTDLP_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30)
+            )
+        return self._session
+
+    async def _raise_for_status(self, response, url):
+        if response.status < 400:
+            return
+        message = f'HTTP Error {response.status}: {response.reason}'
+        if response.status < 500:
+            # The body says why (e.g. "URL signature expired"), which decides
+            # whether download_scheduler retries or dead-letters the link
+            try:
+                body = (await response.content.read(ERROR_BODY_BYTES)).decode('utf-8', 'replace')
+                if body.strip():
+                    message += ' - ' + ' '.join(body.split())
+            except Exception:
+                pass
+            if response.status == 403 and is_expired(url):
+                message += ' - URL signature expired'
+        raise DirectDownloadError(message)
+
+    async def _probe(self, session, url):
+        # Some CDNs reject or drop HEAD; in that case just stream with a single GET
+        import aiohttp
+        try:
+            async with session.head(url, allow_redirects=True) as response:
+                if response.status >= 400:
+                    return None, False
+                size = response.headers.get('Content-Length')
+                accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                return (int(size) if size and size.isdigit() else None), accepts_ranges
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            return None, False
+
+    async def _download(self, url, path):
+        session = await self._get_session()
+        size, accepts_ranges = await self._probe(session, url)
+        part_path = f'{path}.part'
+        # Partial files are kept on failure so the next attempt can resume
+        progress = _TransferProgress(self.progress_bus, url, size)
+        stream_partial = os.path.exists(part_path) and not os.path.exists(f'{part_path}.ranges')
+        if stream_partial and size and os.path.getsize(part_path) >= size:
+            # Nothing left to fetch, so it can't be checked against the server
+            self._discard_partial(part_path)
+            stream_partial = False
+        if (accepts_ranges and size and size >= self.range_threshold and self.range_parts > 1
+                and not stream_partial):
+            try:
+                sha256 = await self._download_ranged(session, url, part_path, size, progress)
+            except _RangeNotSupported:
+                self._discard_partial(part_path)
+                progress = _TransferProgress(self.progress_bus, url, size)
+                sha256 = await self._download_stream(session, url, part_path, progress)
+        else:
+            if os.path.exists(f'{part_path}.ranges'):
+                # Left by a ranged attempt; its .part is not a contiguous prefix
+                self._discard_partial(part_path)
+            # A .part from an earlier streamed attempt is continued from its end
+            sha256 = await self._download_stream(session, url, part_path, progress)
+        os.replace(part_path, path)
+        progress.finish()
+        return sha256
+
+    def _discard_partial(self, part_path):
+        for leftover in (part_path, f'{part_path}.ranges'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    def _hash_existing(self, part_path, hasher):
+        offset = 0
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+                offset += len(chunk)
+        return offset
+
+    async def _download_stream(self, session, url, part_path, progress, resume=True):
+        hasher = hashlib.sha256()
+        offset = self._hash_existing(part_path, hasher) if resume and os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        async with session.get(url, headers=headers) as response:
+            if offset and response.status == 416:
+                # Range starts past the end: the partial doesn't match this file
+                resume = False
+            else:
+                await self._raise_for_status(response, url)
+                if offset and response.status != 206:
+                    # Server ignored the Range header and is sending everything
+                    offset = 0
+                    hasher = hashlib.sha256()
+                if progress.total_bytes is None and response.content_length:
+                    progress.total_bytes = response.content_length + offset
+                progress.add(offset)
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        progress.add(len(chunk))
+        if not resume:
+            self._discard_partial(part_path)
+            return await self._download_stream(session, url, part_path, progress, resume=False)
+        return hasher.hexdigest()
+
+    async def _download_ranged(self, session, url, part_path, size, progress):
+        part_size = -(-size // self.range_parts)
+        ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+        finished = [asyncio.Event() for _ in ranges]
+
+        # Bytes already written per range, saved to a sidecar so an interrupted
+        # download only refetches what is missing
+        state_path = f'{part_path}.ranges'
+        done = self._load_range_state(part_path, state_path, size, ranges)
+
+        def save_state():
+            with open(f'{state_path}.tmp', 'w') as f:
+                json.dump({'size': size, 'ranges': ranges, 'done': done}, f)
+            os.replace(f'{state_path}.tmp', state_path)
+
+        if done is None:
+            done = [0] * len(ranges)
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+            # Written right away so a preallocated .part is never mistaken for a prefix
+            save_state()
+        progress.add(sum(done))
+
+        async def fetch(index, start, end):
+            begin = start + done[index]
+            if begin <= end:
+                async with session.get(url, headers={'Range': f'bytes={begin}-{end}'}) as response:
+                    await self._raise_for_status(response, url)
+                    if response.status != 206:
+                        raise _RangeNotSupported()
+                    unsaved = 0
+                    with open(part_path, 'r+b') as f:
+                        f.seek(begin)
+                        try:
+                            async for chunk in response.content.iter_chunked(self.chunk_size):
+                                f.write(chunk)
+                                done[index] += len(chunk)
+                                unsaved += len(chunk)
+                                progress.add(len(chunk))
+                                if unsaved >= 2 * 1024 * 1024:
+                                    f.flush()
+                                    save_state()
+                                    unsaved = 0
+                        finally:
+                            f.flush()
+                            save_state()
+                if start + done[index] != end + 1:
+                    raise DirectDownloadError(f'Incomplete range {start}-{end}: got {done[index]} bytes')
+            finished[index].set()
+
+        async def hash_in_order():
+            # Parts finish out of order; hash each one as soon as all earlier parts are in
+            hasher = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for index, (start, end) in enumerate(ranges):
+                    await finished[index].wait()
+                    f.seek(start)
+                    remaining = end - start + 1
+                    while remaining:
+                        chunk = f.read(min(1024 * 1024, remaining))
+                        hasher.update(chunk)
+                        remaining -= len(chunk)
+            return hasher.hexdigest()
+
+        fetches = [asyncio.ensure_future(fetch(i, start, end)) for i, (start, end) in enumerate(ranges)]
+        hasher_task = asyncio.ensure_future(hash_in_order())
+        try:
+            await asyncio.gather(*fetches)
+            sha256 = await hasher_task
+        except BaseException:
+            for task in fetches + [hasher_task]:
+                task.cancel()
+            raise
+        os.remove(state_path)
+        return sha256
+
+    def _load_range_state(self, part_path, state_path, size, ranges):
+        if not (os.path.exists(part_path) and os.path.exists(state_path)):
+            return None
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != size or [tuple(r) for r in state.get('ranges', [])] != ranges:
+            return None
+        if os.path.getsize(part_path) != size:
+            return None
+        return state['done']
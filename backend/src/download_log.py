@@ -0,0 +1,187 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def open_connection(db_file):
+    """Autocommit connection in WAL mode, shared setup for the download databases"""
+    conn = sqlite3.connect(db_file, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+class ThreadConnections:
+    """Callable returning this thread's connection to db_file (opened on first use)"""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.db_file)
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+@contextmanager
+def transaction(conn):
+    """BEGIN IMMEDIATE on an open_connection(); COMMIT on exit, ROLLBACK if the block raises"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+class DownloadLog:
+    """SQLite-backed download history (replaces rewriting downloaded_log.json).
+
+    Runs in WAL mode so several processes can read while one writes, keeps
+    an indexed row per URL and maintains the success counter on every write
+    instead of rescanning the log. Each thread gets its own connection.
+    """
+
+    def __init__(self, db_file='downloaded_log.db', json_log=None):
+        self.db_file = db_file
+        self._connect = ThreadConnections(db_file)
+        self._create_schema()
+        if json_log:
+            self.import_json(json_log)
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                url TEXT PRIMARY KEY,
+                filename TEXT,
+                timestamp TEXT,
+                success INTEGER NOT NULL,
+                output_folder TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('total_downloads', '0');
+        """)
+
+    def _get_meta(self, conn, key):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def record(self, url, filename, success=True, output_folder=None):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn = self._connect()
+        with transaction(conn):
+            row = conn.execute('SELECT success FROM downloads WHERE url = ?', (url,)).fetchone()
+            delta = int(bool(success)) - (row['success'] if row else 0)
+            conn.execute(
+                'INSERT OR REPLACE INTO downloads (url, filename, timestamp, success, output_folder) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, filename, timestamp, int(bool(success)), output_folder)
+            )
+            if delta:
+                conn.execute(
+                    "UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = 'total_downloads'",
+                    (delta,)
+                )
+            self._set_meta(conn, 'last_download', json.dumps({
+                'url': url,
+                'filename': filename,
+                'timestamp': timestamp,
+                'success': bool(success)
+            }))
+
+    def get(self, url):
+        row = self._connect().execute(
+            'SELECT filename, timestamp, success, output_folder FROM downloads WHERE url = ?', (url,)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def is_downloaded(self, url):
+        row = self._connect().execute(
+            'SELECT 1 FROM downloads WHERE url = ? AND success = 1', (url,)
+        ).fetchone()
+        return row is not None
+
+    def all(self):
+        rows = self._connect().execute(
+            'SELECT url, filename, timestamp, success, output_folder FROM downloads'
+        )
+        return {row['url']: self._row_to_entry(row) for row in rows}
+
+    def _row_to_entry(self, row):
+        return {
+            'filename': row['filename'],
+            'timestamp': row['timestamp'],
+            'success': bool(row['success']),
+            'output_folder': row['output_folder']
+        }
+
+    def success_count(self):
+        return int(self._get_meta(self._connect(), 'total_downloads') or 0)
+
+    def last_download(self):
+        value = self._get_meta(self._connect(), 'last_download')
+        return json.loads(value) if value else None
+
+    def clear_failed(self):
+        conn = self._connect()
+        with transaction(conn):
+            removed = conn.execute('DELETE FROM downloads WHERE success = 0').rowcount
+            self._set_meta(conn, 'last_updated', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        return removed
+
+    def import_json(self, json_log):
+        """One-time import of an existing downloaded_log.json"""
+        if not os.path.exists(json_log):
+            return 0
+        conn = self._connect()
+        if self._get_meta(conn, 'imported_json'):
+            return 0
+        try:
+            with open(json_log, 'r') as f:
+                downloads = json.load(f).get('downloads', {})
+        except Exception as e:
+            print(f"Warning: Could not import {json_log}: {e}")
+            return 0
+
+        with transaction(conn):
+            # Entries already written to the database win over the old file
+            conn.executemany(
+                'INSERT OR IGNORE INTO downloads (url, filename, timestamp, success, output_folder) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (url, entry.get('filename'), entry.get('timestamp'),
+                     int(bool(entry.get('success'))), entry.get('output_folder'))
+                    for url, entry in downloads.items()
+                ]
+            )
+            count = conn.execute('SELECT COUNT(*) FROM downloads WHERE success = 1').fetchone()[0]
+            self._set_meta(conn, 'total_downloads', str(count))
+            self._set_meta(conn, 'imported_json', os.path.abspath(json_log))
+
+        print(f"✓ Imported {len(downloads)} entries from {json_log} into {self.db_file}")
+        return len(downloads)
+
+    def close(self):
+        self._connect.close()
@@ -0,0 +1,280 @@
+import os
+import time
+import socket
+import threading
+
+from download_log import ThreadConnections, transaction
+
+QUEUED = 'queued'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+DEAD = 'dead'
+
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.part.ranges', '.part.ranges.tmp')
+
+
+def is_partial_file(filename):
+    """yt-dlp / direct engine leftovers: .part, .ytdl, .part-Frag<N>, .part.ranges"""
+    return filename.endswith(PARTIAL_SUFFIXES) or '.part-Frag' in filename
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; rely on lease expiry
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        # A killed process can linger as a zombie until its parent reaps it
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rpartition(')')[2].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return True
+
+
+class DownloadQueue:
+    """Crash-safe download job queue stored next to the download log.
+
+    Every URL of a batch becomes a job (queued -> in_progress -> done/failed).
+    Failures whose category is permanent (expired link, unsupported URL,
+    404, ...) or that used up retry_budget attempts are moved to the dead
+    state; dead-lettered URLs are not queued again until requeue_dead().
+    A worker claims a job with a lease that a heartbeat thread keeps renewing;
+    if the process dies, the lease runs out (or, on the same machine, the
+    owner's pid is gone) and the next run picks the job up again. The job
+    keeps its output file stem across attempts, so yt-dlp and the direct
+    engine find the old .part file and resume instead of starting over.
+    """
+
+    def __init__(self, db_file='downloaded_log.db', lease_seconds=600, retry_budget=3):
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.retry_budget = retry_budget
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._connect = ThreadConnections(db_file)
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._heartbeat = None
+        self._create_schema()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS download_jobs (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                stem TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                error_category TEXT,
+                enqueued_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_download_jobs_state ON download_jobs (state);
+        """)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(download_jobs)')}
+        if 'error_category' not in columns:
+            conn.execute('ALTER TABLE download_jobs ADD COLUMN error_category TEXT')
+
+    def _lease_dead(self, owner, expires, now):
+        if owner == self.owner:
+            return False
+        if expires is None or expires < now:
+            return True
+        host, _, pid = (owner or '').rpartition(':')
+        return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+    def enqueue(self, urls):
+        """Add URLs as queued jobs; failed jobs are queued again. Returns new job count"""
+        now = time.time()
+        conn = self._connect()
+        with transaction(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO download_jobs (url, state, enqueued_at, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                [(url, QUEUED, now, now) for url in urls]
+            )
+            added = conn.total_changes - before
+            conn.executemany(
+                'UPDATE download_jobs SET state = ?, updated_at = ? WHERE url = ? AND state = ?',
+                [(QUEUED, now, url, FAILED) for url in urls]
+            )
+        return added
+
+    def recover(self):
+        """Return in-progress jobs whose owner died to the queue. Returns their URLs"""
+        now = time.time()
+        conn = self._connect()
+        with transaction(conn):
+            rows = conn.execute(
+                'SELECT url, lease_owner, lease_expires FROM download_jobs WHERE state = ?',
+                (IN_PROGRESS,)
+            ).fetchall()
+            orphaned = [row['url'] for row in rows
+                        if self._lease_dead(row['lease_owner'], row['lease_expires'], now)]
+            conn.executemany(
+                'UPDATE download_jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, '
+                'updated_at = ? WHERE url = ?',
+                [(QUEUED, now, url) for url in orphaned]
+            )
+        return orphaned
+
+    def unfinished(self):
+        """URLs still queued, started ones (with partial files) first"""
+        rows = self._connect().execute(
+            'SELECT url FROM download_jobs WHERE state = ? '
+            'ORDER BY stem IS NOT NULL DESC, enqueued_at, rowid',
+            (QUEUED,)
+        )
+        return [row['url'] for row in rows]
+
+    def claim(self, url, stem):
+        """Lease url's job for this process.
+
+        Returns (stem, resumed): the stem stored with the job if an earlier
+        attempt left one, otherwise the given stem. Returns (None, False) if
+        the job is done, dead-lettered or held by another live process.
+        """
+        now = time.time()
+        conn = self._connect()
+        with transaction(conn):
+            row = conn.execute(
+                'SELECT state, stem, lease_owner, lease_expires FROM download_jobs WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    'INSERT INTO download_jobs (url, state, enqueued_at, updated_at) VALUES (?, ?, ?, ?)',
+                    (url, QUEUED, now, now)
+                )
+            elif row['state'] in (DONE, DEAD):
+                return None, False
+            elif row['state'] == IN_PROGRESS and not self._lease_dead(row['lease_owner'], row['lease_expires'], now):
+                return None, False
+            resumed = bool(row and row['stem'])
+            if resumed:
+                stem = row['stem']
+            conn.execute(
+                'UPDATE download_jobs SET state = ?, stem = ?, lease_owner = ?, lease_expires = ?, '
+                'attempts = attempts + 1, updated_at = ? WHERE url = ?',
+                (IN_PROGRESS, stem, self.owner, now + self.lease_seconds, now, url)
+            )
+        with self._held_lock:
+            self._held.add(url)
+        self._start_heartbeat()
+        return stem, resumed
+
+    def complete(self, url):
+        self._finish(url, DONE, None)
+
+    def fail(self, url, error=None, category=None, permanent=False):
+        """Record a failed attempt; returns the new state (FAILED or DEAD).
+
+        Without a category (nothing to classify, e.g. yt-dlp missing) the
+        job is only marked failed and never dead-lettered.
+        """
+        state = FAILED
+        if category:
+            row = self._connect().execute(
+                'SELECT attempts FROM download_jobs WHERE url = ?', (url,)
+            ).fetchone()
+            if permanent or (row and row['attempts'] >= self.retry_budget):
+                state = DEAD
+        self._finish(url, state, error, category)
+        return state
+
+    def _finish(self, url, state, error, category=None):
+        with self._held_lock:
+            self._held.discard(url)
+        self._connect().execute(
+            'UPDATE download_jobs SET state = ?, last_error = ?, error_category = ?, lease_owner = NULL, '
+            'lease_expires = NULL, updated_at = ? WHERE url = ? AND lease_owner = ?',
+            (state, error[-500:] if error else None, category, time.time(), url, self.owner)
+        )
+
+    def dead_letter(self, urls, category, error=None):
+        """Dead-letter urls without an attempt (e.g. links already expired)"""
+        now = time.time()
+        conn = self._connect()
+        with transaction(conn):
+            conn.executemany(
+                'INSERT OR IGNORE INTO download_jobs (url, state, enqueued_at, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                [(url, QUEUED, now, now) for url in urls]
+            )
+            conn.executemany(
+                'UPDATE download_jobs SET state = ?, error_category = ?, last_error = ?, updated_at = ? '
+                'WHERE url = ? AND state IN (?, ?)',
+                [(DEAD, category, error, now, url, QUEUED, FAILED) for url in urls]
+            )
+
+    def dead_urls(self):
+        rows = self._connect().execute('SELECT url FROM download_jobs WHERE state = ?', (DEAD,))
+        return {row['url'] for row in rows}
+
+    def dead_letters(self):
+        """Dead-lettered jobs, newest first"""
+        rows = self._connect().execute(
+            'SELECT url, error_category, attempts, last_error, updated_at FROM download_jobs '
+            'WHERE state = ? ORDER BY updated_at DESC',
+            (DEAD,)
+        )
+        return [dict(row) for row in rows]
+
+    def requeue_dead(self, category=None):
+        """Give dead-lettered jobs (optionally one category) a fresh retry budget"""
+        query = 'UPDATE download_jobs SET state = ?, attempts = 0, updated_at = ? WHERE state = ?'
+        params = [QUEUED, time.time(), DEAD]
+        if category:
+            query += ' AND error_category = ?'
+            params.append(category)
+        return self._connect().execute(query, params).rowcount
+
+    def renew(self):
+        with self._held_lock:
+            held = list(self._held)
+        if not held:
+            return
+        expires = time.time() + self.lease_seconds
+        self._connect().executemany(
+            'UPDATE download_jobs SET lease_expires = ? WHERE url = ? AND lease_owner = ?',
+            [(expires, url, self.owner) for url in held]
+        )
+
+    def _start_heartbeat(self):
+        with self._held_lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='download-queue-lease',
+                                               daemon=True)
+        self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(max(1.0, self.lease_seconds / 3))
+            try:
+                self.renew()
+            except Exception as e:
+                print(f"  Warning: Could not renew download leases: {e}")
+
+    def active_stems(self):
+        """Output stems of jobs that may still resume (not done or dead)"""
+        rows = self._connect().execute(
+            'SELECT stem FROM download_jobs WHERE state NOT IN (?, ?) AND stem IS NOT NULL', (DONE, DEAD)
+        )
+        return {row['stem'] for row in rows}
+
+    def counts(self):
+        rows = self._connect().execute('SELECT state, COUNT(*) AS n FROM download_jobs GROUP BY state')
+        return {row['state']: row['n'] for row in rows}
+
+    def close(self):
+        self._connect.close()
@@ -0,0 +1,212 @@
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# Failure categories, checked in order: (category, kind, markers in the error output).
+# 'permanent' categories are dead-lettered by the download queue right away.
+FAILURE_CATEGORIES = (
+    ('expired_link', PERMANENT, ('URL signature expired', 'Signature expired', 'Bad URL timestamp',
+                                 'URL timestamp expired', 'HTTP Error 410')),
+    ('unsupported_url', PERMANENT, ('Unsupported URL',)),
+    ('not_found', PERMANENT, ('HTTP Error 404', 'Not Found', 'Video unavailable')),
+    ('private', PERMANENT, ('This video is private', 'login required', 'Login required')),
+    ('duplicate_content', PERMANENT, ('Duplicate content',)),
+    ('rate_limited', RATE_LIMITED, ('HTTP Error 429', 'Too Many Requests')),
+    ('forbidden', RATE_LIMITED, ('HTTP Error 403', 'Forbidden')),
+    ('server_error', TRANSIENT, ('HTTP Error 500', 'HTTP Error 502', 'HTTP Error 503', 'HTTP Error 504')),
+    ('stalled', TRANSIENT, ('stalled',)),
+    ('network', TRANSIENT, ('timed out', 'Timeout', 'Connection reset', 'Connection refused',
+                            'Connection aborted', 'Temporary failure', 'Remote end closed',
+                            'IncompleteRead')),
+)
+UNKNOWN = 'unknown'
+_CATEGORY_KINDS = {category: kind for category, kind, _ in FAILURE_CATEGORIES}
+
+
+def classify_error(error_output):
+    """Map yt-dlp/HTTP error output to a FAILURE_CATEGORIES name (or 'unknown')"""
+    if not error_output:
+        return UNKNOWN
+    for category, _, markers in FAILURE_CATEGORIES:
+        if any(marker in error_output for marker in markers):
+            return category
+    return UNKNOWN
+
+
+def is_permanent(category):
+    return _CATEGORY_KINDS.get(category) == PERMANENT
+
+
+def classify_failure(error_output):
+    """Map yt-dlp/HTTP error output to RATE_LIMITED, TRANSIENT or PERMANENT"""
+    # Unknown errors aren't retried within a run; the queue's budget covers them
+    return _CATEGORY_KINDS.get(classify_error(error_output), PERMANENT)
+
+
+def get_host(url):
+    try:
+        return urlparse(url).netloc.lower()
+    except ValueError:
+        return ''
+
+
+class _HostState:
+    def __init__(self, burst):
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.backoff_until = 0.0
+        self.circuit_open_until = 0.0
+        self.probe_in_flight = False
+        self.consecutive_blocks = 0
+        self.successes = 0
+        self.failures = 0
+
+
+class DownloadScheduler:
+    """Per-host rate limiting, retry backoff and circuit breaking for downloads.
+
+    Each host gets a token bucket (rate_per_host requests/s, up to burst).
+    Transient failures and 403/429 responses push the host into exponential
+    backoff with jitter, and the job is retried up to max_retries times.
+    After breaker_threshold consecutive 403/429s the host's circuit opens
+    for breaker_cooldown seconds; when it elapses a single probe request
+    is let through (half-open), and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, rate_per_host=2.0, burst=4, max_retries=2, backoff_base=5.0,
+                 backoff_max=300.0, breaker_threshold=3, breaker_cooldown=300.0):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.burst)
+        return state
+
+    def _refill(self, state, now):
+        state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate_per_host)
+        state.refilled_at = now
+
+    def _wait_time(self, state, now):
+        if state.circuit_open_until:
+            if now < state.circuit_open_until:
+                return state.circuit_open_until - now
+            if state.probe_in_flight:
+                # Half-open: wait for the probe's verdict
+                return 1.0
+        if now < state.backoff_until:
+            return state.backoff_until - now
+        self._refill(state, now)
+        if state.tokens < 1:
+            return (1 - state.tokens) / self.rate_per_host
+        return 0.0
+
+    def ready_in(self, host):
+        """Seconds until a request to host may start (0 = now); does not reserve"""
+        with self._lock:
+            return self._wait_time(self._state(host), time.monotonic())
+
+    def is_paused(self, host):
+        """True while host's circuit is open (before the half-open probe)"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return bool(state and time.monotonic() < state.circuit_open_until)
+
+    def acquire(self, host):
+        """Block until host may take another request, then reserve it"""
+        while True:
+            with self._lock:
+                state = self._state(host)
+                now = time.monotonic()
+                wait = self._wait_time(state, now)
+                if wait <= 0:
+                    state.tokens -= 1
+                    if state.circuit_open_until:
+                        state.probe_in_flight = True
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def record_success(self, host):
+        with self._lock:
+            state = self._state(host)
+            state.successes += 1
+            state.consecutive_blocks = 0
+            state.circuit_open_until = 0.0
+            state.probe_in_flight = False
+
+    def record_failure(self, host, kind, attempt):
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            state.probe_in_flight = False
+            if kind == PERMANENT:
+                return
+            now = time.monotonic()
+            if kind == RATE_LIMITED:
+                state.consecutive_blocks += 1
+                if state.circuit_open_until or state.consecutive_blocks >= self.breaker_threshold:
+                    state.circuit_open_until = now + self.breaker_cooldown
+                    print(f"  ⛔ Circuit open for {host}: pausing {self.breaker_cooldown:.0f}s "
+                          f"after {state.consecutive_blocks} blocked requests")
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+            state.backoff_until = max(state.backoff_until, now + delay)
+
+    def run(self, url, job):
+        """Run job() -> (success, result, error_output) for url under the host's policy.
+
+        Returns (success, result) from the last attempt.
+        """
+        host = get_host(url)
+        attempt = 0
+        while True:
+            self.acquire(host)
+            success, result, error_output = job()
+            if success:
+                self.record_success(host)
+                return success, result
+
+            kind = classify_failure(error_output)
+            self.record_failure(host, kind, attempt)
+            # Don't sit out a whole circuit cooldown inside one job
+            if kind == PERMANENT or attempt >= self.max_retries or self.is_paused(host):
+                return success, result
+            attempt += 1
+            print(f"  ↻ Retrying {url[:60]} ({kind}, attempt {attempt + 1}/{self.max_retries + 1}, "
+                  f"backoff {self.ready_in(host):.0f}s)")
+
+    def get_state(self):
+        """Snapshot of every host's limiter, backoff and circuit state"""
+        now = time.monotonic()
+        snapshot = {}
+        with self._lock:
+            for host, state in self._hosts.items():
+                self._refill(state, now)
+                if not state.circuit_open_until:
+                    circuit = 'closed'
+                elif now < state.circuit_open_until:
+                    circuit = 'open'
+                else:
+                    circuit = 'half-open'
+                snapshot[host] = {
+                    'circuit': circuit,
+                    'circuit_reopens_in': round(max(0.0, state.circuit_open_until - now), 1),
+                    'tokens': round(state.tokens, 2),
+                    'backoff_remaining': round(max(0.0, state.backoff_until - now), 1),
+                    'consecutive_blocks': state.consecutive_blocks,
+                    'successes': state.successes,
+                    'failures': state.failures,
+                }
+        return snapshot
@@ -0,0 +1,176 @@
+import json
+from urllib.parse import parse_qsl, urlencode
+
+from network_capture import FEED_URL_HINTS, find_video_urls_in_payload
+
+# Variable names feeds use for "page after this cursor"
+CURSOR_KEYS = ('cursor', 'after', 'endCursor', 'end_cursor', 'next_cursor')
+
+_SKIP_HEADERS = {'content-length', 'host', 'cookie', 'connection', 'accept-encoding'}
+
+
+def parse_payload(text):
+    """JSON body of a feed response; streamed GraphQL sends one object per line"""
+    try:
+        return [json.loads(text)]
+    except ValueError:
+        pass
+    objects = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith(('{', '[')):
+            try:
+                objects.append(json.loads(line))
+            except ValueError:
+                continue
+    return objects
+
+
+def find_next_cursor(objects):
+    """(cursor, has_next_page) from the first page_info-like dict in the payload"""
+    stack = list(objects)
+    while stack:
+        node = stack.pop(0)
+        if isinstance(node, dict):
+            for key in ('end_cursor', 'endCursor', 'next_cursor', 'nextCursor'):
+                cursor = node.get(key)
+                if isinstance(cursor, str) and cursor:
+                    has_next = node.get('has_next_page', node.get('hasNextPage', True))
+                    return cursor, bool(has_next)
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None, False
+
+
+class _RequestTemplate:
+    """A recorded pagination request whose cursor variable can be swapped"""
+
+    def __init__(self, url, method, headers, body_format, fields, cursor_key):
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.body_format = body_format
+        self.fields = fields
+        self.cursor_key = cursor_key
+
+    @classmethod
+    def from_request(cls, request):
+        post_data = request.post_data
+        if not post_data:
+            return None
+        body_format, fields = 'form', None
+        try:
+            fields = json.loads(post_data)
+            body_format = 'json'
+        except ValueError:
+            fields = dict(parse_qsl(post_data, keep_blank_values=True))
+        if not isinstance(fields, dict):
+            return None
+
+        variables = fields.get('variables')
+        if isinstance(variables, str):
+            try:
+                variables = json.loads(variables)
+            except ValueError:
+                return None
+        if not isinstance(variables, dict):
+            return None
+        cursor_key = next((k for k in CURSOR_KEYS if variables.get(k)), None)
+        if cursor_key is None:
+            return None
+
+        headers = {k: v for k, v in request.headers.items()
+                   if k.lower() not in _SKIP_HEADERS and not k.startswith(':')}
+        return cls(request.url, request.method, headers, body_format, fields, cursor_key)
+
+    def build_body(self, cursor):
+        fields = dict(self.fields)
+        variables = fields['variables']
+        encoded = isinstance(variables, str)
+        variables = dict(json.loads(variables) if encoded else variables)
+        variables[self.cursor_key] = cursor
+        fields['variables'] = json.dumps(variables, separators=(',', ':')) if encoded else variables
+        if self.body_format == 'json':
+            return json.dumps(fields)
+        return urlencode(fields)
+
+
+class FeedPaginator:
+    """Pages through a feed by replaying its own pagination request.
+
+    Attached to a page, it waits for the first feed request that carries a
+    cursor variable (the one the page sends when you scroll) and remembers it
+    together with the next cursor from its response. replay() then re-sends
+    that request with each new cursor through the context's request API,
+    which shares the page's cookies, until the feed runs out, a cursor
+    repeats, or the caller has enough URLs. Nothing is rendered or scrolled.
+    """
+
+    def __init__(self, url_hints=FEED_URL_HINTS, max_pages=50):
+        self.url_hints = url_hints
+        self.max_pages = max_pages
+        self.reset()
+
+    def reset(self):
+        """Forget the recorded request (before crawling another feed)"""
+        self.template = None
+        self.next_cursor = None
+        self.has_next = False
+        self.pages_fetched = 0
+        self.disabled = False
+
+    @property
+    def ready(self):
+        return not self.disabled and self.template is not None and self.next_cursor is not None
+
+    def attach(self, page):
+        page.on('response', self._on_response)
+        return self
+
+    async def _on_response(self, response):
+        if self.template is not None or self.disabled:
+            return
+        request = response.request
+        if request.method != 'POST' or not any(hint in request.url.lower() for hint in self.url_hints):
+            return
+        try:
+            template = _RequestTemplate.from_request(request)
+            if template is None:
+                return
+            cursor, has_next = find_next_cursor(parse_payload(await response.text()))
+        except Exception:
+            return
+        if cursor:
+            self.template = template
+            self.next_cursor, self.has_next = cursor, has_next
+
+    async def replay(self, request_context, on_urls, should_stop=lambda: False):
+        """Fetch pages until the cursor is exhausted; on_urls(list) gets each page's video URLs.
+
+        Returns False if the replayed request stopped working, so the caller
+        can fall back to scrolling.
+        """
+        seen_cursors = set()
+        while self.has_next and self.next_cursor and not should_stop():
+            if self.next_cursor in seen_cursors or self.pages_fetched >= self.max_pages:
+                break
+            seen_cursors.add(self.next_cursor)
+            response = await request_context.fetch(
+                self.template.url,
+                method=self.template.method,
+                headers=self.template.headers,
+                data=self.template.build_body(self.next_cursor)
+            )
+            if not response.ok:
+                print(f"  Feed replay got HTTP {response.status}, falling back to scrolling")
+                self.disabled = True
+                return False
+            text = await response.text()
+            self.pages_fetched += 1
+            on_urls(find_video_urls_in_payload(text))
+            cursor, has_next = find_next_cursor(parse_payload(text))
+            if not cursor:
+                break
+            self.next_cursor, self.has_next = cursor, has_next
+        return True
@@ -5,28 +5,111 @@ import time
 import argparse
 from datetime import datetime
 
-# Import our modules
-from video_scraper import VideoScraper
-from video_processor import VideoProcessor
-from youtube_manager import YouTubeManager
 import config
 
 class VideoAutomationSystem:
+    """Scraper, downloader and uploader, each built (and its modules imported) on first use.
+
+    Playwright, yt-dlp and the Google client libraries are only loaded by
+    the modes that need them, so `--mode status` starts in a fraction of
+    the time a full run does (see benchmarks/benchmark_startup.py).
+    """
 
     def __init__(self):
-        self.scraper = VideoScraper(urls_file=config.URLS_FILE)
-        self.downloader = VideoProcessor(
+        self._scraper = None
+        self._downloader = None
+        self._uploader = None
+
+    @property
+    def scraper(self):
+        if self._scraper is None:
+            self._scraper = self._build_scraper()
+        return self._scraper
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            self._downloader = self._build_downloader()
+        return self._downloader
+
+    @property
+    def uploader(self):
+        if self._uploader is None:
+            self._uploader = self._build_uploader()
+        return self._uploader
+
+    def _build_scraper(self):
+        from video_scraper import VideoScraper
+        from browser_pool import BrowserService
+        from url_index import SeenIndex
+
+        return VideoScraper(
+            urls_file=config.URLS_FILE,
+            url_db=config.DOWNLOAD_LOG_DB,
+            parallel_pages=config.SCRAPER_PARALLEL_PAGES,
+            follow_posts=config.SCRAPER_FOLLOW_POSTS,
+            capture_mode=config.SCRAPER_CAPTURE_MODE,
+            pagination=config.SCRAPER_PAGINATION,
+            max_idle_polls=config.SCRAPER_MAX_IDLE_POLLS,
+            page_load_timeout=config.SCRAPER_PAGE_LOAD_DELAY,
+            scroll_timeout=config.SCRAPER_SCROLL_DELAY,
+            click_timeout=config.SCRAPER_CLICK_DELAY,
+            lean=config.SCRAPER_LEAN,
+            browser_service=BrowserService(
+                user_data_dir=config.SCRAPER_BROWSER_PROFILE,
+                port=config.SCRAPER_BROWSER_PORT,
+                headless=config.SCRAPER_HEADLESS,
+                max_pages=config.SCRAPER_BROWSER_MAX_PAGES,
+                max_memory_mb=config.SCRAPER_BROWSER_MAX_MEMORY_MB
+            ) if config.SCRAPER_WARM_BROWSER else None,
+            seen_index=SeenIndex(
+                config.DOWNLOAD_LOG_DB,
+                bloom_capacity=config.SCRAPER_SEEN_BLOOM_CAPACITY
+            )
+        )
+
+    def _build_downloader(self):
+        from video_processor import VideoProcessor
+        from download_scheduler import DownloadScheduler
+
+        return VideoProcessor(
             output_folder=config.VIDEOS_FOLDER,
-            urls_file=config.URLS_FILE
+            urls_file=config.URLS_FILE,
+            max_workers=config.DOWNLOAD_MAX_WORKERS,
+            per_host_limit=config.DOWNLOAD_PER_HOST_LIMIT,
+            uploaded_folder=config.UPLOADED_FOLDER,
+            hash_index_file=config.HASH_INDEX_FILE,
+            download_log_db=config.DOWNLOAD_LOG_DB,
+            engine=config.DOWNLOAD_ENGINE,
+            direct_downloads=config.DIRECT_DOWNLOADS,
+            stall_timeout=config.DOWNLOAD_STALL_TIMEOUT,
+            scheduler=DownloadScheduler(
+                rate_per_host=config.DOWNLOAD_RATE_PER_HOST,
+                burst=config.DOWNLOAD_BURST_PER_HOST,
+                max_retries=config.DOWNLOAD_MAX_RETRIES,
+                backoff_base=config.DOWNLOAD_BACKOFF_BASE,
+                backoff_max=config.DOWNLOAD_BACKOFF_MAX,
+                breaker_threshold=config.CIRCUIT_BREAKER_THRESHOLD,
+                breaker_cooldown=config.CIRCUIT_BREAKER_COOLDOWN
+            ),
+            lease_seconds=config.DOWNLOAD_LEASE_SECONDS,
+            retry_budget=config.DOWNLOAD_RETRY_BUDGET,
+            expiry_margin=config.DOWNLOAD_EXPIRY_MARGIN
         )
-        self.uploader = YouTubeManager(
+
+    def _build_uploader(self):
+        from youtube_manager import YouTubeManager
+
+        uploader = YouTubeManager(
             credentials_file=config.CREDENTIALS_FILE,
-            videos_folder=config.VIDEOS_FOLDER
+            videos_folder=config.VIDEOS_FOLDER,
+            parallel_uploads=config.UPLOAD_PARALLEL
         )
 
         # Update uploader settings from config
-        self.uploader.uploaded_folder = config.UPLOADED_FOLDER
-        self.uploader.token_file = config.TOKEN_FILE
+        uploader.uploaded_folder = config.UPLOADED_FOLDER
+        uploader.token_file = config.TOKEN_FILE
+        return uploader
 
     def run_full_workflow(self):
         print(f"\n{'🚀'*10}")
@@ -42,7 +125,8 @@ class VideoAutomationSystem:
             scraped_urls = self.scraper.scrape_meta_ai_videos(
                 start_url=config.META_AI_START_URL,
                 num_videos=config.NUM_VIDEOS_TO_SCRAPE,
-                headless=config.SCRAPER_HEADLESS
+                headless=config.SCRAPER_HEADLESS,
+                start_urls=config.SCRAPER_START_URLS
             )
 
             if not scraped_urls:
@@ -125,7 +209,8 @@ class VideoAutomationSystem:
         urls = self.scraper.scrape_meta_ai_videos(
             start_url=config.META_AI_START_URL,
             num_videos=config.NUM_VIDEOS_TO_SCRAPE,
-            headless=config.SCRAPER_HEADLESS
+            headless=config.SCRAPER_HEADLESS,
+            start_urls=config.SCRAPER_START_URLS
         )
         print(f"Scraped {len(urls)} video URLs")
         return urls
@@ -142,31 +227,47 @@ class VideoAutomationSystem:
         self.start_scheduled_uploads()
 
     def show_status(self):
-        print(f"\n{'📊'*5} SYSTEM STATUS {'📊'*5}")
+        # One read of the pipeline snapshot the stages keep up to date; never
+        # builds the scraper or downloader (Playwright, yt-dlp)
+        from pipeline_status import PipelineStatus
+        from url_store import PENDING, DOWNLOADING, DOWNLOADED, UPLOADED, FAILED, EXPIRED
 
-        # Scraper status
+        print(f"\n{'📊'*5} SYSTEM STATUS {'📊'*5}")
         try:
-            pending_urls = len(self.scraper.get_pending_urls())
-            print(f"📋 Scraped URLs: {pending_urls} pending")
-        except:
-            print("📋 Scraped URLs: Unable to read")
+            snapshot = PipelineStatus(config.DOWNLOAD_LOG_DB).snapshot(folders={
+                'videos': config.VIDEOS_FOLDER,
+                'uploaded': config.UPLOADED_FOLDER,
+            })
+        except Exception as e:
+            print(f"❌ Unable to read status: {e}")
+            print(f"{'📊'*15}\n")
+            return None
+
+        urls = snapshot['urls']
+        videos = snapshot['folders']['videos']
+        uploaded = snapshot['folders']['uploaded']
+        print(f"📋 Scraped URLs: {sum(urls.values())} total, {urls.get(PENDING, 0)} pending")
+        print(f"⬇️ Downloaded videos: {snapshot['downloads']} completed, "
+              f"{urls.get(DOWNLOADING, 0)} in progress, {urls.get(PENDING, 0)} pending")
+        print(f"   URL states: {urls.get(DOWNLOADED, 0)} downloaded, {urls.get(UPLOADED, 0)} uploaded, "
+              f"{urls.get(FAILED, 0)} failed, {urls.get(EXPIRED, 0)} expired")
+        print(f"⬆️ Videos ready for upload: {videos['files']} ({videos['bytes'] / (1024 * 1024):.1f} MB)")
+        print(f"📁 Uploaded folder: {uploaded['files']} videos ({uploaded['bytes'] / (1024 * 1024):.1f} MB)")
+        for stage, activity in snapshot['activity'].items():
+            if activity:
+                print(f"🕒 Last {stage}: {activity['timestamp']} - {activity['detail']}")
+            else:
+                print(f"🕒 Last {stage}: never")
 
-        # Downloader status
-        try:
-            downloaded_count = self.downloader.get_downloaded_count()
-            pending_downloads = len(self.downloader.get_pending_urls())
-            print(f"⬇️ Downloaded videos: {downloaded_count} completed, {pending_downloads} pending")
-        except:
-            print("⬇️ Downloaded videos: Unable to read")
+        print(f"{'📊'*15}\n")
+        return snapshot
 
-        # Uploader status
-        try:
-            video_files = len(self.uploader.get_video_files())
-            print(f"⬆️ Videos ready for upload: {video_files}")
-        except:
-            print("⬆️ Videos ready for upload: Unable to read")
+    def export_urls(self, out_file=None):
+        from url_export import export_urls
 
-        print(f"{'📊'*15}\n")
+        out_file = out_file or config.URLS_EXPORT_FILE
+        print(f"Exporting scraped URLs to {out_file}...")
+        return export_urls(out_file, db_file=config.DOWNLOAD_LOG_DB)
 
     def schedule_videos(self):
         print("Starting Video Scheduler...")
@@ -174,7 +275,7 @@ class VideoAutomationSystem:
         
         try:
             self.uploader.authenticate()
-            uploaded, failed = self.uploader.upload_and_schedule_all_videos()
+            uploaded, failed, skipped = self.uploader.upload_and_schedule_all_videos()
             
             print(f"\n{'✅'*5} SCHEDULING COMPLETE {'✅'*5}")
             if uploaded > 0:
@@ -186,6 +287,9 @@ class VideoAutomationSystem:
             if failed > 0:
                 print(f"❌ Failed uploads: {failed} videos")
                 print("   These videos remain in the videos/ folder")
+
+            if skipped > 0:
+                print(f"⏭️  Skipped (quota): {skipped} videos, left in the videos/ folder for the next run")
                 
         except Exception as e:
             print(f"❌ Error during scheduling: {e}")
@@ -202,16 +306,17 @@ def show_interactive_menu():
     print("4. Upload Videos Only (Scheduled)")
     print("5. Show System Status")
     print("6. Video Scheduler (Upload & Schedule)")
+    print(f"7. Export URL Store ({config.URLS_EXPORT_FILE})")
     print("0. Exit")
     print(f"\n{'='*50}")
     
     while True:
         try:
-            choice = input("Enter your choice (0-6): ").strip()
-            if choice in ['0', '1', '2', '3', '4', '5', '6']:
+            choice = input("Enter your choice (0-7): ").strip()
+            if choice in ['0', '1', '2', '3', '4', '5', '6', '7']:
                 return int(choice)
             else:
-                print("❌ Invalid choice! Please enter a number between 0-6.")
+                print("❌ Invalid choice! Please enter a number between 0-7.")
         except (ValueError, KeyboardInterrupt):
             print("\n👋 Goodbye!")
             return 0
@@ -231,18 +336,25 @@ Examples:
   python main.py --mode schedule      # Only upload (scheduled)
   python main.py --mode status        # Show system status
   python main.py --mode scheduler     # Upload & schedule all videos
+  python main.py --mode export        # Write the URL store to a spreadsheet
+  python main.py --mode export --output urls.csv
             """
         )
 
         parser.add_argument(
             '--mode',
-            choices=['full', 'scrape', 'download', 'schedule', 'status', 'scheduler'],
+            choices=['full', 'scrape', 'download', 'schedule', 'status', 'scheduler', 'export'],
             default='full',
             help='Operation mode (default: full)'
         )
+        parser.add_argument(
+            '--output',
+            help=f'Export file, .xlsx/.csv/.parquet (default: {config.URLS_EXPORT_FILE})'
+        )
 
         args = parser.parse_args()
         mode = args.mode
+        output = args.output
     else:
         # Use interactive mode
         choice = show_interactive_menu()
@@ -256,9 +368,11 @@ Examples:
             3: 'download',
             4: 'schedule',
             5: 'status',
-            6: 'scheduler'
+            6: 'scheduler',
+            7: 'export'
         }
         mode = mode_map[choice]
+        output = None
 
     # Initialize the system
     system = VideoAutomationSystem()
@@ -285,6 +399,9 @@ Examples:
     elif mode == 'scheduler':
         system.schedule_videos()
 
+    elif mode == 'export':
+        system.export_urls(output)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,118 @@
+import re
+from urllib.parse import urlparse, urlunparse
+
+import config
+from url_index import CDN_DOMAINS
+
+# Video URLs inside JSON / GraphQL payloads (after unescaping)
+_PAYLOAD_VIDEO_URL = re.compile(
+    r'https://[^"\'\s<>\\]+?\.(?:' + '|'.join(ext[1:] for ext in config.VIDEO_EXTENSIONS) + r')(?:\?[^"\'\s<>\\]*)?'
+)
+_UNICODE_ESCAPE = re.compile(r'\\u([0-9a-fA-F]{4})')
+
+# Query params that only select a byte range of the same file (MSE players)
+_RANGE_PARAMS = {'bytestart', 'byteend', 'range'}
+
+_PAYLOAD_TYPES = ('application/json', 'text/javascript', 'application/x-javascript', 'text/plain')
+
+# URL fragments of the endpoints that return feed data
+FEED_URL_HINTS = ('graphql', '/api/', 'feed')
+
+# Hosts (and their subdomains) whose videos are kept; ads, embeds and other
+# third-party media the page loads are ignored
+MEDIA_HOSTS = CDN_DOMAINS + ('meta.ai',)
+
+
+def strip_range_params(url):
+    parsed = urlparse(url)
+    if not parsed.query:
+        return url
+    # Filter the raw pairs so the signed params keep their exact encoding
+    query = '&'.join(
+        pair for pair in parsed.query.split('&')
+        if pair.split('=', 1)[0].lower() not in _RANGE_PARAMS
+    )
+    return urlunparse(parsed._replace(query=query))
+
+
+def find_video_urls_in_payload(text):
+    """Video URLs in a JSON/GraphQL response body, with JSON escaping undone"""
+    if not any(ext in text for ext in config.VIDEO_EXTENSIONS):
+        return []
+    text = text.replace('\\/', '/')
+    text = _UNICODE_ESCAPE.sub(lambda m: chr(int(m.group(1), 16)), text)
+    return [strip_range_params(url) for url in _PAYLOAD_VIDEO_URL.findall(text)]
+
+
+def is_allowed_media_host(url):
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == domain or host.endswith('.' + domain) for domain in MEDIA_HOSTS)
+
+
+def is_media_response(url, resource_type, content_type):
+    if resource_type == 'media' or content_type.startswith('video/'):
+        return True
+    return urlparse(url).path.lower().endswith(config.VIDEO_EXTENSIONS)
+
+
+class NetworkVideoCollector:
+    """Finds video URLs in a page's network traffic instead of its DOM.
+
+    Attached to a Playwright (async) page, it looks at every response:
+    media requests (including the byte-range fetches behind blob: players)
+    yield their URL with range params stripped, and feed JSON / GraphQL
+    payloads are searched for video URLs as they arrive. Only URLs on
+    MEDIA_HOSTS are kept. drain() returns what was found since the
+    previous call.
+    """
+
+    def __init__(self, max_payload_bytes=5 * 1024 * 1024, payload_hints=FEED_URL_HINTS):
+        self.max_payload_bytes = max_payload_bytes
+        self.payload_hints = payload_hints
+        self._found = []
+        self._seen = set()
+        self.responses_seen = 0
+        self.payloads_parsed = 0
+
+    def attach(self, page):
+        page.on('response', self._on_response)
+        return self
+
+    def add_media_url(self, url):
+        """Record a media request seen some other way (e.g. aborted by a route)"""
+        self._add(strip_range_params(url))
+
+    def _add(self, url):
+        if url.startswith('http') and url not in self._seen and is_allowed_media_host(url):
+            self._seen.add(url)
+            self._found.append(url)
+
+    async def _on_response(self, response):
+        self.responses_seen += 1
+        try:
+            url = response.url
+            content_type = (response.headers.get('content-type') or '').lower()
+            if is_media_response(url, response.request.resource_type, content_type):
+                self._add(strip_range_params(url))
+                return
+            if not self._is_feed_payload(url, content_type, response.headers.get('content-length')):
+                return
+            text = await response.text()
+            self.payloads_parsed += 1
+            for video_url in find_video_urls_in_payload(text):
+                self._add(video_url)
+        except Exception:
+            # Bodies of redirects, aborted or evicted responses can't be read
+            pass
+
+    def _is_feed_payload(self, url, content_type, content_length):
+        if not content_type.startswith(_PAYLOAD_TYPES):
+            return False
+        if content_length and content_length.isdigit() and int(content_length) > self.max_payload_bytes:
+            return False
+        lowered = url.lower()
+        return any(hint in lowered for hint in self.payload_hints)
+
+    def drain(self):
+        found, self._found = self._found, []
+        return found
@@ -0,0 +1,82 @@
+import os
+import json
+from datetime import datetime
+
+import config
+from download_log import ThreadConnections
+from url_store import UrlStore
+
+STAGES = ('scrape', 'download', 'upload')
+
+
+class PipelineStatus:
+    """Pipeline snapshot for show_status, kept up to date by the stages themselves.
+
+    URL counts per status come from the URL store's counters, completed
+    downloads from the download log's. Each stage records its last activity
+    here as it runs. Folder totals (video files and bytes) are cached with
+    the folder's mtime and only rescanned after a file was added, renamed
+    or removed; downloads are written to .part files and renamed when
+    done, so a finished video always changes the folder's mtime. Reading a
+    snapshot is a few rows from meta plus one stat per folder.
+    """
+
+    def __init__(self, db_file='downloaded_log.db', url_store=None):
+        self.db_file = db_file
+        self.url_store = url_store if url_store is not None else UrlStore(db_file)
+        self._connect = ThreadConnections(db_file)
+
+    def _get_meta(self, key):
+        row = self._connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def _set_meta(self, key, value):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value))
+        )
+
+    def record_activity(self, stage, detail=''):
+        """Note that stage (scrape/download/upload) just did something"""
+        try:
+            self._set_meta(f'activity:{stage}', {
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'detail': detail,
+            })
+        except Exception as e:
+            # Status bookkeeping must never fail the stage that reports it
+            print(f"  Warning: Could not record {stage} activity: {e}")
+
+    def last_activity(self, stage):
+        return self._get_meta(f'activity:{stage}')
+
+    def folder_stats(self, folder):
+        """{'files', 'bytes'} of the video files in folder, rescanned only if it changed"""
+        path = os.path.abspath(folder)
+        key = f'folder:{path}'
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {'files': 0, 'bytes': 0}
+        cached = self._get_meta(key)
+        if cached and cached['mtime_ns'] == mtime_ns:
+            return {'files': cached['files'], 'bytes': cached['bytes']}
+
+        files = size = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(config.VIDEO_EXTENSIONS) and entry.is_file():
+                    files += 1
+                    size += entry.stat().st_size
+        # mtime was taken before the scan, so a change during it triggers another
+        self._set_meta(key, {'mtime_ns': mtime_ns, 'files': files, 'bytes': size})
+        return {'files': files, 'bytes': size}
+
+    def snapshot(self, folders=None):
+        """Counts per URL status, completed downloads, folder totals and last activity per stage"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'total_downloads'").fetchone()
+        return {
+            'urls': self.url_store.status_counts(),
+            'downloads': int(row['value']) if row else 0,
+            'folders': {name: self.folder_stats(folder) for name, folder in (folders or {}).items()},
+            'activity': {stage: self.last_activity(stage) for stage in STAGES},
+        }
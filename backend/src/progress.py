@@ -0,0 +1,154 @@
+import re
+import json
+import time
+import threading
+
+# yt-dlp prints one machine-readable JSON progress line per update with this template
+PROGRESS_PREFIX = '__progress__ '
+YTDLP_PROGRESS_TEMPLATE = 'download:' + PROGRESS_PREFIX + '%(progress)j'
+
+# Fallback for yt-dlp's default human-readable '[download]' lines
+_PROGRESS_LINE = re.compile(
+    r'\[download\]\s+(?P<percent>[\d.]+)%\s+of\s+~?\s*(?P<total>[\d.]+)(?P<total_unit>[KMGT]?i?B)'
+    r'(?:\s+at\s+(?P<speed>[\d.]+)(?P<speed_unit>[KMGT]?i?B)/s)?'
+    r'(?:\s+ETA\s+(?P<eta>[\d:]+))?'
+    r'(?:\s+\(frag\s+(?P<frag>\d+)/(?P<frags>\d+)\))?'
+)
+
+_UNITS = {'B': 1, 'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4,
+          'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4}
+
+
+class ProgressBus:
+    """Fans download progress events out to subscribers.
+
+    Subscribers are plain callables taking one event dict; the CLI printer
+    below is one, a web API can register its own. Events look like:
+
+        {'url', 'engine', 'status', 'downloaded_bytes', 'total_bytes',
+         'percent', 'speed', 'eta', 'fragment_index', 'fragment_count',
+         'timestamp'}
+
+    status is 'downloading', 'finished', 'error' or 'stalled'; any numeric
+    field may be None when the source doesn't know it.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, event):
+        event.setdefault('timestamp', time.time())
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"  Warning: progress subscriber failed: {e}")
+
+
+def make_event(url, engine, info):
+    """Normalize a yt-dlp style progress dict into a bus event"""
+    total = info.get('total_bytes') or info.get('total_bytes_estimate')
+    downloaded = info.get('downloaded_bytes')
+    percent = info.get('percent')
+    if percent is None and total and downloaded is not None:
+        percent = round(downloaded * 100.0 / total, 1)
+    return {
+        'url': url,
+        'engine': engine,
+        'status': info.get('status', 'downloading'),
+        'downloaded_bytes': downloaded,
+        'total_bytes': total,
+        'percent': percent,
+        'speed': info.get('speed'),
+        'eta': info.get('eta'),
+        'fragment_index': info.get('fragment_index'),
+        'fragment_count': info.get('fragment_count'),
+    }
+
+
+def _to_bytes(value, unit):
+    return int(float(value) * _UNITS.get(unit, 1))
+
+
+def _to_seconds(eta):
+    seconds = 0
+    for part in eta.split(':'):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def parse_progress_line(line):
+    """Parse one yt-dlp output line into a progress dict, or None if it isn't one"""
+    line = line.strip()
+    if line.startswith(PROGRESS_PREFIX):
+        try:
+            return json.loads(line[len(PROGRESS_PREFIX):])
+        except ValueError:
+            return None
+
+    match = _PROGRESS_LINE.search(line)
+    if not match:
+        return None
+    total = _to_bytes(match.group('total'), match.group('total_unit'))
+    percent = float(match.group('percent'))
+    return {
+        'status': 'finished' if percent >= 100 else 'downloading',
+        'percent': percent,
+        'total_bytes': total,
+        'downloaded_bytes': int(total * percent / 100),
+        'speed': _to_bytes(match.group('speed'), match.group('speed_unit')) if match.group('speed') else None,
+        'eta': _to_seconds(match.group('eta')) if match.group('eta') else None,
+        'fragment_index': int(match.group('frag')) if match.group('frag') else None,
+        'fragment_count': int(match.group('frags')) if match.group('frags') else None,
+    }
+
+
+class ConsoleProgressPrinter:
+    """Progress subscriber for the CLI: one line per job every few seconds"""
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self._last_print = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        now = time.monotonic()
+        url = event['url']
+        with self._lock:
+            if event['status'] == 'downloading' and now - self._last_print.get(url, 0) < self.interval:
+                return
+            self._last_print[url] = now
+            if event['status'] != 'downloading':
+                self._last_print.pop(url, None)
+
+        mb = 1024 * 1024
+        parts = []
+        if event['percent'] is not None:
+            parts.append(f"{event['percent']:5.1f}%")
+        if event['downloaded_bytes'] is not None:
+            size = f"{event['downloaded_bytes'] / mb:.1f}"
+            if event['total_bytes']:
+                size += f"/{event['total_bytes'] / mb:.1f}"
+            parts.append(f"{size} MB")
+        if event['speed']:
+            parts.append(f"at {event['speed'] / mb:.2f} MB/s")
+        if event['eta'] is not None and event['status'] == 'downloading':
+            parts.append(f"ETA {int(event['eta'])}s")
+        if event['fragment_index'] and event['fragment_count']:
+            parts.append(f"frag {event['fragment_index']}/{event['fragment_count']}")
+
+        icon = {'downloading': '⬇', 'finished': '✓', 'stalled': '⏸', 'error': '✗'}.get(event['status'], '•')
+        print(f"  {icon} [{url[-40:]}] {' '.join(parts) or event['status']}")
@@ -0,0 +1,58 @@
+from urllib.parse import urlparse
+
+from network_capture import is_media_response
+
+# Analytics and logging endpoints that never carry video URLs
+TRACKER_HOSTS = ('google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'connect.facebook.net')
+TRACKER_PATHS = ('/tr/', '/ajax/bz', '/logging_client_events')
+
+BLOCKED_RESOURCE_TYPES = ('image', 'font')
+
+
+def classify_request(url, resource_type):
+    """Why a request isn't needed for scraping ('tracker', 'media', 'image', 'font'), or None"""
+    parsed = urlparse(url)
+    host, path = parsed.netloc.lower(), parsed.path.lower()
+    if any(host == tracker or host.endswith('.' + tracker) for tracker in TRACKER_HOSTS):
+        return 'tracker'
+    if any(fragment in path for fragment in TRACKER_PATHS):
+        return 'tracker'
+    if is_media_response(url, resource_type, ''):
+        return 'media'
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return resource_type
+    return None
+
+
+class ResourceBlocker:
+    """Aborts the requests a scrape doesn't need (lean mode).
+
+    Routed on a page (or context), it lets documents, scripts and feed
+    requests through and aborts images, fonts, trackers and video bodies,
+    including the byte-range fetches of blob: players. Aborted URLs are
+    kept per category in blocked; media URLs are also handed to on_media,
+    since an aborted request never produces a response to capture.
+    """
+
+    def __init__(self):
+        self.blocked = {}
+
+    async def attach(self, target, on_media=None):
+        async def handle(route):
+            await self._handle(route, on_media)
+        await target.route('**/*', handle)
+
+    async def _handle(self, route, on_media):
+        request = route.request
+        category = classify_request(request.url, request.resource_type)
+        if category is None:
+            # Let context-level routes (e.g. a FixtureServer) see it; without one it goes out
+            await route.fallback()
+            return
+        self.blocked.setdefault(category, []).append(request.url)
+        if category == 'media' and on_media:
+            on_media(request.url)
+        await route.abort('blockedbyclient')
+
+    def summary(self):
+        return ', '.join(f"{len(urls)} {category}" for category, urls in sorted(self.blocked.items()))
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Record a scrape session into a fixture and replay it offline.
+
+A fixture is a folder with manifest.json, the bodies of the documents,
+scripts and JSON responses the page loaded, the media URLs it requested,
+and DOM snapshots taken after each scroll (and of a few post pages).
+FixtureServer serves it from a local HTTP server and routes a Playwright
+context there, so scraper code runs against it without touching the
+network. Requests the fixture doesn't have are aborted.
+
+    python scrape_fixtures.py record https://www.meta.ai/vibes fixtures/vibes --scrolls 10
+    python scrape_fixtures.py synthetic fixtures/synthetic --sizes 50,500,2000
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from network_capture import is_media_response
+
+MANIFEST = 'manifest.json'
+BODY_TYPES = ('document', 'script', 'stylesheet', 'xhr', 'fetch')
+SNAPSHOT_PATH = '/__fixture__/snapshot/'
+
+
+def load_manifest(fixture_dir):
+    with open(os.path.join(fixture_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+class FixtureRecorder:
+    """Collects responses and DOM snapshots from a (sync) Playwright context"""
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.entries = []
+        self.snapshots = []
+        self.media_urls = []
+        os.makedirs(os.path.join(fixture_dir, 'bodies'), exist_ok=True)
+        os.makedirs(os.path.join(fixture_dir, 'snapshots'), exist_ok=True)
+
+    def attach(self, context):
+        context.on('response', self._on_response)
+        return self
+
+    def _write(self, folder, data):
+        name = hashlib.sha1(data).hexdigest()[:16]
+        with open(os.path.join(self.fixture_dir, folder, name), 'wb') as f:
+            f.write(data)
+        return f'{folder}/{name}'
+
+    def _on_response(self, response):
+        request = response.request
+        content_type = response.headers.get('content-type', '')
+        entry = {
+            'url': response.url,
+            'method': request.method,
+            'status': response.status,
+            'content_type': content_type,
+            'resource_type': request.resource_type,
+            'body': None,
+        }
+        if is_media_response(response.url, request.resource_type, content_type.lower()):
+            self.media_urls.append(response.url)
+        elif request.resource_type in BODY_TYPES:
+            try:
+                entry['body'] = self._write('bodies', response.body())
+            except Exception:
+                # Redirects and evicted responses have no body
+                pass
+        self.entries.append(entry)
+
+    def snapshot(self, page, name, kind):
+        """Save the current DOM; kind is 'feed' or 'post'"""
+        self.snapshots.append({
+            'name': name,
+            'kind': kind,
+            'page_url': page.url,
+            'file': self._write('snapshots', page.content().encode('utf-8')),
+        })
+
+    def save(self, start_url, **extra):
+        manifest = {
+            'start_url': start_url,
+            'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'entries': self.entries,
+            'snapshots': self.snapshots,
+            'media_urls': sorted(set(self.media_urls)),
+            **extra,
+        }
+        with open(os.path.join(self.fixture_dir, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=1)
+        return manifest
+
+
+def record_session(start_url, fixture_dir, scrolls=10, posts=5, headless=True):
+    """Scroll start_url live, snapshotting the feed after each scroll and a few post pages"""
+    from playwright.sync_api import sync_playwright
+
+    recorder = FixtureRecorder(fixture_dir)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        context = browser.new_context(viewport={'width': 1280, 'height': 720})
+        recorder.attach(context)
+        page = context.new_page()
+        page.goto(start_url, wait_until='domcontentloaded', timeout=30000)
+        page.wait_for_load_state('networkidle', timeout=15000)
+        recorder.snapshot(page, 'feed-0', 'feed')
+        for i in range(1, scrolls + 1):
+            page.evaluate('window.scrollBy(0, 1200)')
+            try:
+                page.wait_for_load_state('networkidle', timeout=5000)
+            except Exception:
+                pass
+            recorder.snapshot(page, f'feed-{i}', 'feed')
+            print(f"  Recorded scroll {i}/{scrolls}")
+
+        post_links = page.eval_on_selector_all('a[href*="/post/"]', 'els => els.map(e => e.href)')
+        for i, post_url in enumerate(dict.fromkeys(post_links)):
+            if i >= posts:
+                break
+            page.goto(post_url, wait_until='domcontentloaded', timeout=30000)
+            try:
+                page.wait_for_load_state('networkidle', timeout=10000)
+            except Exception:
+                pass
+            recorder.snapshot(page, f'post-{i}', 'post')
+        browser.close()
+
+    manifest = recorder.save(start_url)
+    print(f"✓ Recorded {len(manifest['entries'])} responses, {len(manifest['snapshots'])} snapshots "
+          f"and {len(manifest['media_urls'])} media URLs into {fixture_dir}")
+    return manifest
+
+
+def build_synthetic_fixture(fixture_dir, sizes=(50, 500, 2000), posts=20, feed_pages=5, urls_per_feed_page=20,
+                            origin='https://www.meta.ai', filler_per_card=20):
+    """A fixture of generated feed pages (one per size), post pages and a paginated feed API.
+
+    Feed pages POST the first cursor to the feed API on load, like the real
+    feed does when scrolled; its feed_pages recordings chain cursors until
+    the last one. Snapshots list the video URLs and post links they
+    contain, and the manifest the feed API's, so the expected result of
+    every capture path is known. Needs no network.
+    """
+    recorder = FixtureRecorder(fixture_dir)
+    feed_api = f'{origin}/api/graphql/'
+
+    def card_videos(i):
+        return [f'https://video.xx.fbcdn.net/v/t42/{i}.mp4?oe=68F1A2B3&oh=00_{i}',
+                f'https://video.xx.fbcdn.net/v/t42/{i}_hd.mp4?oe=68F1A2B3']
+
+    def card(i):
+        filler = ''.join(f'<span class="meta-{j}">caption {i}-{j}</span>' for j in range(filler_per_card))
+        video, hd_video = card_videos(i)
+        # preload="none" keeps media requests out of it; network capture gets the feed API
+        return (f'<article><a href="{origin}/@user{i % 97}/post/P{i:06d}/">'
+                f'<video preload="none" src="{video.replace("&", "&amp;")}"></video></a>'
+                f'<div data-video-url="{hd_video}"></div>'
+                f'<div>{filler}</div></article>')
+
+    first_page_request = (
+        "<script>fetch('" + feed_api + "', {method: 'POST', "
+        "headers: {'Content-Type': 'application/x-www-form-urlencoded'}, "
+        "body: 'doc_id=1&variables=' + encodeURIComponent(JSON.stringify({cursor: 'c0'}))});</script>"
+    )
+
+    def add_snapshot(name, kind, page_url, indices, extra=''):
+        html = '<html><body><main>' + ''.join(card(i) for i in indices) + '</main>' + extra + '</body></html>'
+        recorder.snapshots.append({
+            'name': name, 'kind': kind, 'page_url': page_url,
+            'file': recorder._write('snapshots', html.encode('utf-8')),
+            'video_urls': [url for i in indices for url in card_videos(i)],
+            'post_urls': [f'{origin}/@user{i % 97}/post/P{i:06d}/' for i in indices],
+        })
+
+    for size in sizes:
+        add_snapshot(f'feed-{size}', 'feed', f'{origin}/vibes', range(size), first_page_request)
+    for i in range(posts):
+        add_snapshot(f'post-{i}', 'post', f'{origin}/@user{i % 97}/post/P{i:06d}/', [i])
+
+    feed_urls = []
+    for page in range(feed_pages):
+        urls = [f'https://video.xx.fbcdn.net/v/t42/feed{page}_{j}.mp4?oe=68F1A2B3'
+                for j in range(urls_per_feed_page)]
+        feed_urls.append(urls)
+        last = page == feed_pages - 1
+        payload = {'data': {'feed': {
+            'edges': [{'node': {'video_url': url}} for url in urls],
+            'page_info': {'end_cursor': None if last else f'c{page + 1}', 'has_next_page': not last},
+        }}}
+        recorder.entries.append({
+            'url': feed_api, 'method': 'POST', 'status': 200, 'content_type': 'application/json',
+            'resource_type': 'fetch', 'body': recorder._write('bodies', json.dumps(payload).encode('utf-8')),
+        })
+    return recorder.save(f'{origin}/vibes', feed_api_urls=feed_urls)
+
+
+class _FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fixture = self.server.fixture
+        relative = self.path.lstrip('/')
+        content_type = fixture.content_types.get(relative)
+        path = os.path.join(fixture.fixture_dir, relative)
+        if content_type is None or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        # Replayed feed requests are POSTs; the body doesn't change the answer
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.do_GET()
+
+
+class _FixtureResponse:
+    """The parts of a Playwright APIResponse that feed replay reads"""
+
+    def __init__(self, status, data):
+        self.status = status
+        self.ok = 200 <= status < 300
+        self._data = data
+
+    async def body(self):
+        return self._data
+
+    async def text(self):
+        return self._data.decode('utf-8', 'replace')
+
+
+class FixtureRequestContext:
+    """Stands in for context.request: requests made outside a page (feed
+    replay) bypass routing, so they are answered from the fixture here"""
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+
+    async def fetch(self, url, method='GET', headers=None, data=None):
+        found = self.fixture.answer(method, url)
+        if found is None:
+            return _FixtureResponse(404, b'')
+        body_file = found[0]
+        if body_file is None:
+            return _FixtureResponse(200, b'')
+        with open(os.path.join(self.fixture.fixture_dir, body_file), 'rb') as f:
+            return _FixtureResponse(200, f.read())
+
+
+class FixtureServer:
+    """Serves a fixture on 127.0.0.1 and routes Playwright contexts to it.
+
+    Requests are matched by method and URL; a URL recorded several times
+    (a paginated feed request) is answered with its recordings in order,
+    repeating the last one, until reset(). Media and other responses
+    recorded without a body (images, fonts) are answered with an empty one.
+    Snapshots are reachable at snapshot_url(name). route() is for sync
+    Playwright contexts, route_async() for async ones, and
+    request_context() answers requests sent outside any page.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.manifest = load_manifest(fixture_dir)
+        self.origin = '{0.scheme}://{0.netloc}'.format(urlparse(self.manifest['start_url']))
+        self.content_types = {}
+        self._responses = {}
+        for entry in self.manifest['entries']:
+            self._responses.setdefault((entry['method'], entry['url']), []).append(entry)
+            if entry['body']:
+                self.content_types[entry['body']] = entry['content_type'] or 'application/octet-stream'
+        self.snapshots = {s['name']: s for s in self.manifest['snapshots']}
+        for snapshot in self.snapshots.values():
+            self.content_types[snapshot['file']] = 'text/html; charset=utf-8'
+        self.media_urls = set(self.manifest['media_urls'])
+        self._served = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.server = None
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureRequestHandler)
+        self.server.daemon_threads = True
+        self.server.fixture = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def local_url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def snapshot_url(self, name):
+        return self.origin + SNAPSHOT_PATH + name
+
+    def reset(self):
+        """Answer repeated requests from their first recording again"""
+        with self._lock:
+            self._served.clear()
+
+    def lookup(self, method, url):
+        """(fixture file or None if recorded without a body, content type), or None if unknown"""
+        if url.startswith(self.origin + SNAPSHOT_PATH):
+            snapshot = self.snapshots.get(url[len(self.origin + SNAPSHOT_PATH):])
+            return (snapshot['file'], 'text/html') if snapshot else None
+        recorded = self._responses.get((method, url))
+        if recorded:
+            with self._lock:
+                index = self._served.get((method, url), 0)
+                self._served[(method, url)] = index + 1
+            entry = recorded[min(index, len(recorded) - 1)]
+            return entry['body'], entry['content_type']
+        if url in self.media_urls:
+            return None, 'video/mp4'
+        return None
+
+    def answer(self, method, url):
+        """lookup(), counted as a hit or a miss"""
+        found = self.lookup(method, url)
+        with self._lock:
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return found
+
+    def request_context(self):
+        return FixtureRequestContext(self)
+
+    def route(self, context):
+        context.route('**/*', self._handle)
+
+    async def route_async(self, context):
+        await context.route('**/*', self._handle_async)
+
+    def _handle(self, route):
+        found = self.answer(route.request.method, route.request.url)
+        if found is None:
+            route.abort('internetdisconnected')
+            return
+        body_file, content_type = found
+        if body_file is None:
+            route.fulfill(status=200, content_type=content_type or 'application/octet-stream', body=b'')
+            return
+        response = route.fetch(url=f'{self.local_url}/{body_file}')
+        route.fulfill(response=response)
+
+    async def _handle_async(self, route):
+        found = self.answer(route.request.method, route.request.url)
+        if found is None:
+            await route.abort('internetdisconnected')
+            return
+        body_file, content_type = found
+        if body_file is None:
+            await route.fulfill(status=200, content_type=content_type or 'application/octet-stream', body=b'')
+            return
+        response = await route.fetch(url=f'{self.local_url}/{body_file}')
+        await route.fulfill(response=response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record or generate scraper fixtures')
+    sub = parser.add_subparsers(dest='command', required=True)
+    record = sub.add_parser('record', help='Record a live feed session (needs network)')
+    record.add_argument('url')
+    record.add_argument('fixture_dir')
+    record.add_argument('--scrolls', type=int, default=10)
+    record.add_argument('--posts', type=int, default=5)
+    record.add_argument('--show-browser', action='store_true')
+    synthetic = sub.add_parser('synthetic', help='Generate a fixture offline')
+    synthetic.add_argument('fixture_dir')
+    synthetic.add_argument('--sizes', default='50,500,2000', help='Cards per generated feed page')
+    synthetic.add_argument('--posts', type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.time()
+    if args.command == 'record':
+        record_session(args.url, args.fixture_dir, args.scrolls, args.posts, headless=not args.show_browser)
+    else:
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        manifest = build_synthetic_fixture(args.fixture_dir, sizes, args.posts)
+        print(f"✓ Wrote {len(manifest['snapshots'])} snapshots to {args.fixture_dir}")
+    print(f"  Took {time.time() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
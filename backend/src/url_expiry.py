@@ -0,0 +1,55 @@
+import time
+import calendar
+from urllib.parse import urlparse, parse_qs
+
+# Query parameters holding a plain unix timestamp (seconds or milliseconds)
+_TIMESTAMP_PARAMS = ('expires', 'Expires', 'expire', 'x-expires', 'exp')
+
+
+def _first(params, name):
+    values = params.get(name)
+    return values[0] if values else None
+
+
+def parse_url_expiry(url):
+    """Expiry time (unix seconds) of a signed URL, or None if it carries none.
+
+    Understands Meta CDN links (oe=<hex timestamp>), S3 presigned URLs
+    (X-Amz-Date + X-Amz-Expires) and the usual expires/expire/exp params.
+    """
+    try:
+        params = parse_qs(urlparse(url).query)
+    except ValueError:
+        return None
+
+    oe = _first(params, 'oe')
+    if oe and len(oe) == 8:
+        try:
+            return int(oe, 16)
+        except ValueError:
+            pass
+
+    amz_date, amz_expires = _first(params, 'X-Amz-Date'), _first(params, 'X-Amz-Expires')
+    if amz_date and amz_expires and amz_expires.isdigit():
+        try:
+            signed = calendar.timegm(time.strptime(amz_date, '%Y%m%dT%H%M%SZ'))
+            return signed + int(amz_expires)
+        except ValueError:
+            pass
+
+    for name in _TIMESTAMP_PARAMS:
+        value = _first(params, name)
+        if value and value.isdigit():
+            if len(value) == 13:
+                return int(value) / 1000
+            if len(value) == 10:
+                return int(value)
+    return None
+
+
+def is_expired(url, margin=0, now=None):
+    """True if url's signature expires within margin seconds (False if unsigned)"""
+    expiry = parse_url_expiry(url)
+    if expiry is None:
+        return False
+    return expiry - margin <= (now if now is not None else time.time())
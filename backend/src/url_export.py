@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Export the URL store to a spreadsheet, CSV or Parquet file.
+
+Rows are streamed out of the store in batches and written as they come
+(openpyxl write-only mode for .xlsx, the csv module for .csv, pyarrow row
+groups for .parquet), so memory stays flat however many URLs there are.
+The export goes to a temporary file that replaces the target at the end;
+it only reads the store, so it can run while the scraper is working.
+
+    python url_export.py video_urls_export.xlsx
+    python url_export.py pending.csv --status pending
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+
+from url_store import UrlStore
+
+COLUMNS = ['url', 'scraped_date', 'status', 'filename', 'updated_at']
+FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+def export_format(out_file):
+    fmt = os.path.splitext(out_file)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}' (use one of: {', '.join(FORMATS)})")
+    return fmt
+
+
+def _write_xlsx(rows, path):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('urls')
+    sheet.append(COLUMNS)
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(path)
+    return count
+
+
+def _write_csv(rows, path):
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_parquet(rows, path, batch_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([(column, pa.string()) for column in COLUMNS])
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist([dict(zip(COLUMNS, r)) for r in batch], schema))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_table(pa.Table.from_pylist([dict(zip(COLUMNS, r)) for r in batch], schema))
+            count += len(batch)
+    return count
+
+
+def export_urls(out_file, db_file='downloaded_log.db', statuses=None, batch_size=5000):
+    """Write the store's rows (optionally only some statuses) to out_file; returns the row count"""
+    fmt = export_format(out_file)
+    rows = UrlStore(db_file).iter_rows(statuses, batch_size)
+    directory = os.path.dirname(os.path.abspath(out_file))
+    os.makedirs(directory, exist_ok=True)
+    # Keep the extension so openpyxl accepts the temporary name
+    tmp_file = os.path.join(directory, f'.{os.path.basename(out_file)}.tmp.{fmt}')
+
+    started = time.time()
+    try:
+        if fmt == 'xlsx':
+            count = _write_xlsx(rows, tmp_file)
+        elif fmt == 'csv':
+            count = _write_csv(rows, tmp_file)
+        else:
+            count = _write_parquet(rows, tmp_file, batch_size)
+        os.replace(tmp_file, out_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    print(f"✓ Exported {count} URLs to {out_file} in {time.time() - started:.1f}s")
+    return count
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description='Export scraped URLs from the URL store')
+    parser.add_argument('output', nargs='?', default=config.URLS_EXPORT_FILE,
+                        help=f"Output file: {', '.join('.' + fmt for fmt in FORMATS)} "
+                             f"(default: {config.URLS_EXPORT_FILE})")
+    parser.add_argument('--db', default=config.DOWNLOAD_LOG_DB, help='URL store database')
+    parser.add_argument('--status', action='append',
+                        help='Only export rows with this status (repeatable)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows read per query')
+    args = parser.parse_args()
+
+    try:
+        export_urls(args.output, args.db, args.status, args.batch_size)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
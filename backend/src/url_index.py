@@ -0,0 +1,187 @@
+import os
+import math
+import struct
+import hashlib
+from datetime import datetime
+from urllib.parse import urlparse
+
+from download_log import ThreadConnections, transaction
+
+# Query params that change between fetches of the same asset (signatures,
+# expiry, edge routing, byte ranges); anything starting with these prefixes too
+VOLATILE_PARAMS = {
+    'oh', 'oe', 'efg', 'ccb', 'strext', 'dl', 'vs', 'bytestart', 'byteend', 'range',
+    'expires', 'expire', 'exp', 'x-expires', 'signature', 'sig', 'key-pair-id', 'policy', 'token',
+}
+VOLATILE_PREFIXES = ('_nc_', 'x-amz-')
+
+# CDNs that serve one asset from many edge hostnames
+CDN_DOMAINS = ('fbcdn.net', 'cdninstagram.com')
+
+
+def canonical_url_key(url):
+    """Stable key for the asset behind url: host + path + non-volatile params.
+
+    Two signed links to the same video (different oh/oe/_nc_* values or
+    edge hosts) get the same key.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for domain in CDN_DOMAINS:
+        if host == domain or host.endswith('.' + domain):
+            host = domain
+            break
+    kept = sorted(
+        pair for pair in parsed.query.split('&')
+        if pair and pair.split('=', 1)[0].lower() not in VOLATILE_PARAMS
+        and not pair.lower().startswith(VOLATILE_PREFIXES)
+    )
+    key = host + parsed.path
+    return key + '?' + '&'.join(kept) if kept else key
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, saved as a flat bit array"""
+
+    _HEADER = struct.Struct('<QBQ')  # bits, hashes, last indexed rowid
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.last_rowid = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self._HEADER.pack(self.bits, self.hashes, self.last_rowid))
+            f.write(self.array)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, capacity, error_rate=0.001):
+        """The saved filter, or None if missing or sized for another capacity"""
+        bloom = cls(capacity, error_rate)
+        try:
+            with open(path, 'rb') as f:
+                bits, hashes, last_rowid = cls._HEADER.unpack(f.read(cls._HEADER.size))
+                if (bits, hashes) != (bloom.bits, bloom.hashes):
+                    return None
+                array = f.read()
+        except (OSError, struct.error):
+            return None
+        if len(array) != len(bloom.array):
+            return None
+        bloom.array = bytearray(array)
+        bloom.last_rowid = last_rowid
+        return bloom
+
+
+class SeenIndex:
+    """Persistent set of canonical URL keys the scraper has already seen.
+
+    Keys live in a SQLite table, so a membership check is one indexed
+    lookup and nothing is loaded at startup. With bloom_capacity set, a
+    Bloom filter saved next to the database answers most "never seen"
+    checks without touching SQLite; on load it only catches up on rows
+    added after it was last saved, and it is rebuilt if it is missing.
+    Keys another process adds while the index is open reach the filter on
+    the next catch_up() (done by save()).
+    """
+
+    def __init__(self, db_file, bloom_capacity=None, bloom_error_rate=0.001):
+        self.db_file = db_file
+        self.bloom_file = db_file + '.bloom'
+        self._connect = ThreadConnections(db_file)
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                first_seen TEXT
+            );
+        """)
+        self.bloom = None
+        if bloom_capacity:
+            self._load_bloom(bloom_capacity, bloom_error_rate)
+
+    def _load_bloom(self, capacity, error_rate):
+        self.bloom = BloomFilter.load(self.bloom_file, capacity, error_rate)
+        if self.bloom is None:
+            self.bloom = BloomFilter(capacity, error_rate)
+        self.catch_up()
+
+    def catch_up(self):
+        """Add keys inserted since the filter last looked (all of them for a new filter)"""
+        if self.bloom is None:
+            return
+        rows = self._connect().execute(
+            'SELECT rowid, key FROM seen_urls WHERE rowid > ? ORDER BY rowid', (self.bloom.last_rowid,)
+        )
+        for row in rows:
+            self.bloom.add(row['key'])
+            self.bloom.last_rowid = row['rowid']
+
+    def __contains__(self, key):
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        row = self._connect().execute('SELECT 1 FROM seen_urls WHERE key = ?', (key,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM seen_urls').fetchone()[0]
+
+    def is_empty(self):
+        return self._connect().execute('SELECT 1 FROM seen_urls LIMIT 1').fetchone() is None
+
+    def add(self, url):
+        """Record url's canonical key; True if it was new"""
+        return self.add_many([url]) == 1
+
+    def add_many(self, urls):
+        conn = self._connect()
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        added = 0
+        with transaction(conn):
+            for url in urls:
+                key = canonical_url_key(url)
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO seen_urls (key, url, first_seen) VALUES (?, ?, ?)',
+                    (key, url, now)
+                )
+                if cursor.rowcount:
+                    added += 1
+                    if self.bloom is not None:
+                        self.bloom.add(key)
+        return added
+
+    def discard_many(self, urls):
+        """Forget urls' keys so fresh links to the same assets count as new again.
+
+        The Bloom filter can't drop keys; it keeps answering "maybe" for
+        them, and the table lookup behind it then says no.
+        """
+        conn = self._connect()
+        with transaction(conn):
+            before = conn.total_changes
+            conn.executemany(
+                'DELETE FROM seen_urls WHERE key = ?', [(canonical_url_key(url),) for url in urls]
+            )
+            return conn.total_changes - before
+
+    def save(self):
+        """Persist the Bloom filter (the table itself is always up to date)"""
+        if self.bloom is not None:
+            self.catch_up()
+            self.bloom.save(self.bloom_file)
@@ -0,0 +1,255 @@
+import os
+from datetime import datetime
+
+from download_log import ThreadConnections, transaction
+
+PENDING = 'pending'
+DOWNLOADING = 'downloading'
+DOWNLOADED = 'downloaded'
+UPLOADED = 'uploaded'
+EXPIRED = 'expired'
+FAILED = 'failed'
+
+# Per-status row counts live in meta under this prefix ('urls:pending', ...)
+COUNT_PREFIX = 'urls:'
+
+
+class UrlStore:
+    """SQLite-backed list of scraped URLs and where each one is in the pipeline.
+
+    Replaces video_urls.xlsx as the hand-off between scraper, downloader and
+    uploader: the scraper appends rows as 'pending', the downloader moves
+    them to 'downloading' and then 'downloaded' (or 'failed' / 'expired'),
+    and the uploader marks them 'uploaded' by filename. Status and filename
+    are indexed, so appends and transitions touch single rows instead of
+    rewriting a workbook. The spreadsheet, if there is one, is imported the
+    first time the store is opened, and again only if the file changes
+    (URLs added by hand); rows already in the store are left as they are.
+    Row counts per status are kept in meta and updated in the same
+    transaction as every change, so status_counts() never scans the table.
+    """
+
+    def __init__(self, db_file='downloaded_log.db', import_from=None):
+        self.db_file = db_file
+        self._connect = ThreadConnections(db_file)
+        self._create_schema()
+        if import_from:
+            self.import_xlsx(import_from)
+
+    def _create_schema(self):
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                scraped_date TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                filename TEXT,
+                updated_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_status ON urls (status);
+            CREATE INDEX IF NOT EXISTS idx_urls_filename ON urls (filename);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._seed_counts()
+
+    def _seed_counts(self):
+        """Count rows per status once, for databases made before the counters existed"""
+        conn = self._connect()
+        marker = COUNT_PREFIX + '*'
+        if conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+            return
+        with transaction(conn):
+            if not conn.execute('SELECT 1 FROM meta WHERE key = ?', (marker,)).fetchone():
+                conn.execute('DELETE FROM meta WHERE key LIKE ?', (COUNT_PREFIX + '%',))
+                conn.execute(
+                    'INSERT INTO meta (key, value) SELECT ? || status, COUNT(*) FROM urls GROUP BY status',
+                    (COUNT_PREFIX,)
+                )
+                conn.execute('INSERT INTO meta (key, value) VALUES (?, ?)', (marker, '1'))
+
+    def _bump_counts(self, conn, deltas):
+        """Apply {status: delta} to the counters; call inside the write transaction"""
+        for status, delta in deltas.items():
+            if not delta:
+                continue
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, '0')", (COUNT_PREFIX + status,))
+            conn.execute(
+                'UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = ?',
+                (delta, COUNT_PREFIX + status)
+            )
+
+    def _now(self):
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def import_xlsx(self, xlsx_file):
+        """Import new rows of the old spreadsheet (url, scraped_date, status) if it changed"""
+        if not os.path.exists(xlsx_file):
+            return 0
+        conn = self._connect()
+        key = f'imported:{os.path.abspath(xlsx_file)}'
+        mtime = str(os.path.getmtime(xlsx_file))
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        if row and row['value'] == mtime:
+            return 0
+        try:
+            import pandas as pd
+            df = pd.read_excel(xlsx_file, engine='openpyxl')
+        except Exception as e:
+            print(f"Warning: Could not import {xlsx_file}: {e}")
+            return 0
+        if 'url' not in df.columns:
+            return 0
+
+        rows = []
+        for record in df.to_dict('records'):
+            url = record.get('url')
+            if not isinstance(url, str) or not url:
+                continue
+            status = record.get('status')
+            scraped_date = record.get('scraped_date')
+            rows.append((
+                url,
+                str(scraped_date) if isinstance(scraped_date, (str, datetime)) else None,
+                status if isinstance(status, str) and status else PENDING,
+            ))
+        now = self._now()
+        imported = 0
+        deltas = {}
+        with transaction(conn):
+            for row in rows:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO urls (url, scraped_date, status, updated_at) VALUES (?, ?, ?, ?)',
+                    row + (now,)
+                )
+                if cursor.rowcount:
+                    imported += 1
+                    deltas[row[2]] = deltas.get(row[2], 0) + 1
+            self._bump_counts(conn, deltas)
+            conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, mtime))
+        if imported:
+            print(f"✓ Imported {imported} URLs from {xlsx_file} into {self.db_file}")
+        return imported
+
+    def add_urls(self, urls, scraped_date=None, replaces=()):
+        """Append new URLs as pending; returns how many weren't there yet.
+
+        Rows listed in replaces (expired links the new ones are fresh copies
+        of) are removed in the same transaction.
+        """
+        conn = self._connect()
+        scraped_date = scraped_date or self._now()
+        with transaction(conn):
+            deltas = {}
+            for url in replaces:
+                row = conn.execute('SELECT status FROM urls WHERE url = ?', (url,)).fetchone()
+                if row is not None:
+                    conn.execute('DELETE FROM urls WHERE url = ?', (url,))
+                    deltas[row['status']] = deltas.get(row['status'], 0) - 1
+            self._bump_counts(conn, deltas)
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO urls (url, scraped_date, status, updated_at) VALUES (?, ?, ?, ?)',
+                [(url, scraped_date, PENDING, scraped_date) for url in urls]
+            )
+            added = conn.total_changes - before
+            self._bump_counts(conn, {PENDING: added})
+        return added
+
+    def set_status(self, urls, status, filename=None):
+        """Move existing rows to status (URLs the store doesn't know are ignored)"""
+        conn = self._connect()
+        now = self._now()
+        changed = 0
+        deltas = {}
+        with transaction(conn):
+            for url in urls:
+                row = conn.execute('SELECT status FROM urls WHERE url = ?', (url,)).fetchone()
+                if row is None:
+                    continue
+                if filename is not None:
+                    conn.execute(
+                        'UPDATE urls SET status = ?, filename = ?, updated_at = ? WHERE url = ?',
+                        (status, filename, now, url)
+                    )
+                else:
+                    conn.execute('UPDATE urls SET status = ?, updated_at = ? WHERE url = ?', (status, now, url))
+                changed += 1
+                if row['status'] != status:
+                    deltas[row['status']] = deltas.get(row['status'], 0) - 1
+                    deltas[status] = deltas.get(status, 0) + 1
+            self._bump_counts(conn, deltas)
+        return changed
+
+    def mark_uploaded(self, filename):
+        conn = self._connect()
+        with transaction(conn):
+            deltas = {}
+            rows = conn.execute(
+                'SELECT status, COUNT(*) AS n FROM urls WHERE filename = ? AND status != ? GROUP BY status',
+                (filename, UPLOADED)
+            )
+            for row in rows:
+                deltas[row['status']] = -row['n']
+                deltas[UPLOADED] = deltas.get(UPLOADED, 0) + row['n']
+            cursor = conn.execute(
+                'UPDATE urls SET status = ?, updated_at = ? WHERE filename = ?',
+                (UPLOADED, self._now(), filename)
+            )
+            self._bump_counts(conn, deltas)
+        return cursor.rowcount
+
+    def urls_with_status(self, *statuses):
+        placeholders = ', '.join('?' * len(statuses))
+        rows = self._connect().execute(
+            f'SELECT url FROM urls WHERE status IN ({placeholders}) ORDER BY rowid', statuses
+        )
+        return [row['url'] for row in rows]
+
+    def pending_urls(self):
+        return self.urls_with_status(PENDING)
+
+    def all_urls(self):
+        return [row['url'] for row in self._connect().execute('SELECT url FROM urls ORDER BY rowid')]
+
+    def live_urls(self):
+        """Every URL except expired links, which the scraper may replace with fresh ones"""
+        rows = self._connect().execute('SELECT url FROM urls WHERE status != ? ORDER BY rowid', (EXPIRED,))
+        return [row['url'] for row in rows]
+
+    def iter_rows(self, statuses=None, batch_size=5000):
+        """Yield (url, scraped_date, status, filename, updated_at) in insertion order.
+
+        Reads batch_size rows per query, keyed on rowid, so no read
+        transaction stays open between batches and scrapers writing
+        meanwhile are never held up.
+        """
+        columns = 'rowid, url, scraped_date, status, filename, updated_at'
+        where = 'rowid > ?'
+        params = ()
+        if statuses:
+            where += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params = tuple(statuses)
+        last_rowid = 0
+        while True:
+            rows = self._connect().execute(
+                f'SELECT {columns} FROM urls WHERE {where} ORDER BY rowid LIMIT ?',
+                (last_rowid,) + params + (batch_size,)
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield tuple(row)[1:]
+            last_rowid = rows[-1]['rowid']
+
+    def status_counts(self):
+        """{status: rows}, read from the counters"""
+        rows = self._connect().execute(
+            "SELECT key, value FROM meta WHERE key LIKE ? AND key != ?", (COUNT_PREFIX + '%', COUNT_PREFIX + '*')
+        )
+        counts = {row['key'][len(COUNT_PREFIX):]: int(row['value']) for row in rows}
+        return {status: n for status, n in counts.items() if n}
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM urls').fetchone()[0]
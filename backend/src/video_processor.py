@@ -1,52 +1,318 @@
 import os
 import json
-import subprocess
 import re
 import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 
+import config
+from direct_downloader import DirectHttpEngine
+from download_log import DownloadLog
+from download_queue import DownloadQueue, DEAD, is_partial_file
+from download_scheduler import DownloadScheduler, get_host, classify_error, is_permanent
+from pipeline_status import PipelineStatus
+from progress import ProgressBus, ConsoleProgressPrinter
+from url_expiry import parse_url_expiry, is_expired
+from url_index import SeenIndex
+from url_store import UrlStore, PENDING, DOWNLOADING, DOWNLOADED, EXPIRED, FAILED
+from ytdlp_engine import get_engine
+
+
+# Partial files younger than this are left alone even without a queued job
+PARTIAL_GRACE_SECONDS = 600
+
+
+class FileFingerprinter:
+    """Partial (sampled) and full SHA-256 file hashes; bytes_read counts disk reads"""
+
+    def __init__(self, sample_size=64 * 1024, sample_count=4, buffer_size=1024 * 1024):
+        self.sample_size = sample_size
+        self.sample_count = sample_count
+        self.buffer_size = buffer_size
+        self.bytes_read = 0
+
+    def partial_hash(self, filepath):
+        """Hash of the size plus the head, the tail and a few evenly spaced blocks"""
+        size = os.path.getsize(filepath)
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(size).encode())
+        with open(filepath, 'rb') as f:
+            for offset in self._sample_offsets(size):
+                f.seek(offset)
+                chunk = f.read(self.sample_size)
+                self.bytes_read += len(chunk)
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _sample_offsets(self, size):
+        # Small files are read whole; larger ones are sampled at head, tail
+        # and sample_count blocks in between
+        if size <= self.sample_size * (self.sample_count + 2):
+            return range(0, size, self.sample_size)
+        step = (size - self.sample_size) // (self.sample_count + 1)
+        return [step * i for i in range(self.sample_count + 1)] + [size - self.sample_size]
+
+    def full_hash(self, filepath):
+        hasher = hashlib.sha256()
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        with open(filepath, 'rb', buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                self.bytes_read += n
+                hasher.update(view[:n])
+        return hasher.hexdigest()
+
+
+class ContentHashIndex:
+    """Persistent fingerprints of video files: path -> size, mtime, inode and hashes.
+
+    by_size maps each file size to its paths, so find_duplicate only looks at
+    same-size files and narrows them by partial hash, then full SHA-256.
+    Hashes are cached until a file's stat signature changes.
+    """
+
+    def __init__(self, index_file='hash_index.json', folders=None, fingerprinter=None):
+        self.index_file = index_file
+        self.folders = list(folders or [])
+        self.fingerprinter = fingerprinter or FileFingerprinter()
+        self.entries = {}
+        self.by_size = {}  # size -> paths, for finding duplicate candidates
+        self.refreshed = False
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                files = json.load(f).get('files', {})
+        except Exception as e:
+            print(f"  Warning: Could not read hash index {self.index_file}: {e}")
+            return
+        with self._lock:
+            for path, entry in files.items():
+                self._put(path, entry)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'files': self.entries,
+                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            # Write to a temp file first so a crash never leaves a truncated index
+            tmp_file = f'{self.index_file}.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+
+    def _key(self, path):
+        return os.path.normpath(path)
+
+    def _signature(self, path):
+        st = os.stat(path)
+        return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'inode': st.st_ino}
+
+    def _put(self, path, entry):
+        self._drop(path)
+        self.entries[path] = entry
+        self.by_size.setdefault(entry['size'], set()).add(path)
+
+    def _drop(self, path):
+        entry = self.entries.pop(path, None)
+        if entry:
+            paths = self.by_size.get(entry['size'])
+            if paths:
+                paths.discard(path)
+                if not paths:
+                    del self.by_size[entry['size']]
+        return entry
+
+    def track(self, path):
+        """Return the cached entry for path, resetting it if the file changed"""
+        key = self._key(path)
+        try:
+            signature = self._signature(key)
+        except OSError:
+            self.remove(key)
+            return None
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and all(entry.get(k) == v for k, v in signature.items()):
+                return entry
+            self._put(key, signature)
+            self._dirty = True
+            return signature
+
+    def fingerprint(self, path, tier):
+        """Return the 'partial' or 'sha256' fingerprint of path, computing it at most once"""
+        entry = self.track(path)
+        if entry is None:
+            return None
+        if tier not in entry:
+            compute = self.fingerprinter.partial_hash if tier == 'partial' else self.fingerprinter.full_hash
+            try:
+                value = compute(self._key(path))
+            except OSError as e:
+                print(f"  Warning: Could not fingerprint {path}: {e}")
+                return None
+            with self._lock:
+                entry[tier] = value
+                self._dirty = True
+        return entry[tier]
+
+    def get_hash(self, path):
+        return self.fingerprint(path, 'sha256')
+
+    def record(self, path, sha256):
+        """Store a SHA-256 that was computed elsewhere (e.g. while downloading)"""
+        entry = self.track(path)
+        if entry is not None:
+            with self._lock:
+                entry['sha256'] = sha256
+                self._dirty = True
+
+    def remove(self, path):
+        with self._lock:
+            if self._drop(self._key(path)):
+                self._dirty = True
+
+    def move(self, source, destination):
+        with self._lock:
+            entry = self._drop(self._key(source))
+        if not entry:
+            return
+        self._dirty = True
+        try:
+            # A rename keeps size/mtime/inode, so the fingerprints carry over as-is
+            signature = self._signature(self._key(destination))
+        except OSError:
+            return
+        with self._lock:
+            self._put(self._key(destination), dict(entry, **signature))
+
+    def find_duplicate(self, path):
+        entry = self.track(path)
+        if entry is None:
+            return None
+        key = self._key(path)
+        with self._lock:
+            candidates = [p for p in self.by_size.get(entry['size'], ()) if p != key]
+        
+        # Tier 1: nothing else has this size, so nothing needs to be read
+        for tier in ('partial', 'sha256'):
+            if not candidates:
+                return None
+            value = self.fingerprint(key, tier)
+            if value is None:
+                return None
+            # Tier 2/3: keep only candidates that still match
+            candidates = [c for c in candidates if self.fingerprint(c, tier) == value]
+        return candidates[0] if candidates else None
+
+    def refresh(self):
+        # Only stats files; fingerprints are computed lazily on size collisions
+        seen = set()
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                continue
+            for filename in os.listdir(folder):
+                if filename.lower().endswith(config.VIDEO_EXTENSIONS):
+                    path = self._key(os.path.join(folder, filename))
+                    seen.add(path)
+                    self.track(path)
+        with self._lock:
+            for path in [p for p in self.entries if p not in seen]:
+                self._drop(path)
+                self._dirty = True
+        self.refreshed = True
+        self.save()
+
+
 class VideoProcessor:
-    def __init__(self, output_folder='videos', urls_file='video_urls.json'):
+    def __init__(self, output_folder='videos', urls_file='video_urls.xlsx', max_workers=1, per_host_limit=4,
+                 uploaded_folder='uploaded', hash_index_file='hash_index.json',
+                 download_log_db='downloaded_log.db', engine='auto', direct_downloads=True,
+                 stall_timeout=60, show_progress=True, scheduler=None, lease_seconds=600,
+                 retry_budget=3, expiry_margin=120):
         self.output_folder = output_folder
         self.urls_file = urls_file
         self.downloaded_log = 'downloaded_log.json'
         
+        # Live progress events from every engine; subscribe to consume them
+        self.progress = ProgressBus()
+        if show_progress:
+            self.progress.subscribe(ConsoleProgressPrinter())
+        
+        # yt-dlp engine: in-process API when available, subprocess otherwise
+        self.engine = get_engine(engine, progress_bus=self.progress, stall_timeout=stall_timeout)
+        
+        # Download history lives in SQLite; the old JSON log is imported once
+        self.download_log = DownloadLog(download_log_db, json_log=self.downloaded_log)
+        
+        # Persistent job queue (same database) so a restart resumes where it died
+        # Failures that can't succeed later (or used up retry_budget runs) are dead-lettered
+        self.queue = DownloadQueue(download_log_db, lease_seconds=lease_seconds, retry_budget=retry_budget)
+        
+        # Signed CDN links expiring within this many seconds are not attempted
+        self.expiry_margin = expiry_margin
+        
+        # Scraped URLs and their pipeline status (same database); an old
+        # video_urls.xlsx is imported the first time
+        self.url_store = UrlStore(
+            download_log_db,
+            import_from=urls_file if urls_file.endswith('.xlsx') else None
+        )
+        
+        # Last download shown by `main.py --mode status`
+        self.pipeline_status = PipelineStatus(download_log_db, url_store=self.url_store)
+        
+        # Content-hash index shared by the videos and uploaded folders so
+        # re-downloads of already-published videos are caught too
+        self.hash_index = ContentHashIndex(
+            hash_index_file,
+            folders=[output_folder, uploaded_folder]
+        )
+        
+        # Direct .mp4/.webm links bypass yt-dlp; their hash is computed in flight
+        self.direct_engine = DirectHttpEngine(
+            max_connections=max(16, int(max_workers) * 2),
+            on_complete=self.hash_index.record,
+            progress_bus=self.progress
+        ) if direct_downloads else None
+        
+        # Concurrency settings (max_workers=1 keeps the original serial behaviour)
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        
+        # Per-host rate limits, retry backoff and circuit breaker
+        self.scheduler = scheduler or DownloadScheduler()
+        
+        # Lock guarding the duplicate check when downloads run in parallel
+        self._dedupe_lock = threading.Lock()
+        
+        # Per-thread details of the current job (e.g. error output for retries)
+        self._job = threading.local()
+        
         # Create output folder
         os.makedirs(self.output_folder, exist_ok=True)
     
     def load_downloaded_log(self):
-        if os.path.exists(self.downloaded_log):
-            try:
-                with open(self.downloaded_log, 'r') as f:
-                    data = json.load(f)
-                    return data.get('downloads', {})
-            except:
-                return {}
-        return {}
+        return self.download_log.all()
     
     def save_downloaded_log(self, url, filename, success=True):
-        log_data = self.load_downloaded_log()
-        
-        log_data[url] = {
-            'filename': filename,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'success': success,
-            'output_folder': self.output_folder
-        }
-        
-        data = {
-            'downloads': log_data,
-            'last_download': {
-                'url': url,
-                'filename': filename,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'success': success
-            },
-            'total_downloads': len([k for k, v in log_data.items() if v['success']])
-        }
-        
-        with open(self.downloaded_log, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.download_log.record(url, filename, success=success, output_folder=self.output_folder)
     
     def sanitize_filename(self, filename):
         # Remove or replace invalid characters
@@ -58,13 +324,19 @@ class VideoProcessor:
             filename = filename[:200]
         return filename
     
+    def build_output_stem(self, custom_filename=None):
+        if custom_filename:
+            return self.sanitize_filename(custom_filename)
+        # Timestamp plus a short job id so parallel downloads never share a prefix
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f'video_{timestamp}_{uuid.uuid4().hex[:6]}'
+    
+    def get_url_host(self, url):
+        return get_host(url)
+    
     def calculate_file_hash(self, filepath):
-        hash_sha256 = hashlib.sha256()
         try:
-            with open(filepath, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            return self.hash_index.fingerprinter.full_hash(filepath)
         except Exception as e:
             print(f"  Warning: Could not calculate hash for {filepath}: {e}")
             return None
@@ -72,46 +344,41 @@ class VideoProcessor:
     def check_duplicate_content(self, filepath):
         if not os.path.exists(filepath):
             return False, None
+        
+        # Sync the index with the folders once per process; after that files
+        # are only read when their size collides with another video
+        if not self.hash_index.refreshed:
+            self.hash_index.refresh()
             
-        new_hash = self.calculate_file_hash(filepath)
-        if not new_hash:
-            return False, None
-            
-        # Check all existing video files
-        for filename in os.listdir(self.output_folder):
-            if filename.endswith(('.mp4', '.mov', '.avi', '.mkv', '.webm')):
-                existing_path = os.path.join(self.output_folder, filename)
-                if existing_path != filepath:  # Don't compare with itself
-                    existing_hash = self.calculate_file_hash(existing_path)
-                    if existing_hash and existing_hash == new_hash:
-                        print(f"  ⚠ Duplicate content detected! File {filename} has same content.")
-                        return True, filename
+        existing_path = self.hash_index.find_duplicate(filepath)
+        if existing_path:
+            filename = os.path.basename(existing_path)
+            print(f"  ⚠ Duplicate content detected! File {filename} has same content.")
+            return True, filename
         return False, None
     
     def check_ytdlp_installed(self):
-        try:
-            result = subprocess.run(
-                ['yt-dlp', '--version'],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            return result.returncode == 0
-        except FileNotFoundError:
-            return False
+        # Probe result is cached per process by the engine
+        return self.engine.is_available()
+    
+    def get_engine_for(self, url):
+        if self.direct_engine and self.direct_engine.handles(url):
+            return self.direct_engine
+        return self.engine
     
     def download_video(self, url, custom_filename=None):
+        self._job.error_output = None
+        engine = self.get_engine_for(url)
         
-        # Check if yt-dlp is installed
-        if not self.check_ytdlp_installed():
+        # Check if yt-dlp is installed (not needed for direct media links)
+        if not engine.is_available():
             print(f"\n✗ Error: yt-dlp is not installed!")
             print(f"  Install it with: pip install yt-dlp")
             return False, None
         
         # Check if URL was already downloaded
-        downloaded_log = self.load_downloaded_log()
-        if url in downloaded_log:
-            existing_entry = downloaded_log[url]
+        existing_entry = self.download_log.get(url)
+        if existing_entry:
             if existing_entry.get('success', False):
                 print(f"\n⚠ URL already downloaded: {existing_entry.get('filename', 'unknown')}")
                 print(f"  Timestamp: {existing_entry.get('timestamp', 'unknown')}")
@@ -124,93 +391,66 @@ class VideoProcessor:
             print(f"URL: {url[:70]}{'...' if len(url) > 70 else ''}")
             print(f"{'='*60}\n")
             
-            # Generate timestamp for unique filenames
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            # Filename prefix for this job; a resumed queue job reuses its old
+            # one so the engine continues the .part file it left behind
+            stem = getattr(self._job, 'stem', None) or self.build_output_stem(custom_filename)
+            resumed = getattr(self._job, 'resumed', False)
             
             # Configure output template
             if custom_filename:
                 # Use custom filename
-                clean_name = self.sanitize_filename(custom_filename)
                 output_template = os.path.join(
                     self.output_folder,
-                    f'{clean_name}.%(ext)s'
+                    f'{stem}.%(ext)s'
                 )
             else:
                 # Auto-generate filename with timestamp
                 output_template = os.path.join(
                     self.output_folder,
-                    f'video_{timestamp}_%(title)s.%(ext)s'
+                    f'{stem}_%(title)s.%(ext)s'
                 )
             
-            # yt-dlp command optimized for Meta AI and general video downloads
-            command = [
-                'yt-dlp',
-                url,
-                '-o', output_template,
-                
-                # Format options
-                '--format', 'best',  # Download best quality
-                '--merge-output-format', 'mp4',  # Convert to mp4
-                
-                # Download options
-                '--no-playlist',  # Don't download playlists
-                '--no-warnings',  # Reduce noise
-                
-                # Progress display
-                '--newline',  # Better progress output
-                
-                # Network options
-                '--socket-timeout', '30',
-                '--retries', '3',
-                
-                # Headers to avoid blocks
-                '--add-header', 'User-Agent:Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                '--add-header', 'Accept:text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                '--add-header', 'Accept-Language:en-US,en;q=0.9',
-                
-                # Cookies (helpful for some sites)
-                '--no-check-certificates',
-                
-                # Metadata
-                '--embed-metadata',  # Embed metadata in video
-            ]
-            
             # Get list of files before download
             files_before = set(os.listdir(self.output_folder))
             
             # Execute download
-            print("Starting download with yt-dlp...")
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=False
-            )
+            print(f"Starting download ({engine.name} engine)...")
+            returncode, error_output = engine.download(url, output_template)
             
-            # Get list of files after download
+            # Get list of files after download (only ours - other workers may
+            # be writing into the same folder). A resumed job may find its file
+            # already finished by the run that crashed before logging it.
             files_after = set(os.listdir(self.output_folder))
-            new_files = files_after - files_before
+            new_files = [
+                f for f in files_after
+                if f.startswith(stem) and not is_partial_file(f)
+                and (resumed or f not in files_before)
+            ]
             
-            if result.returncode == 0 and new_files:
+            if returncode == 0 and new_files:
                 # Download successful
                 downloaded_file = list(new_files)[0]
                 file_path = os.path.join(self.output_folder, downloaded_file)
                 file_size = os.path.getsize(file_path) / (1024 * 1024)  # Size in MB
                 
-                # Check for duplicate content
-                is_duplicate, existing_file = self.check_duplicate_content(file_path)
-                if is_duplicate:
-                    print(f"\n⚠ Duplicate video detected! Removing {downloaded_file}")
-                    print(f"  Identical content already exists as: {existing_file}")
-                    try:
-                        os.remove(file_path)
-                        print(f"  ✓ Deleted duplicate file")
-                    except Exception as e:
-                        print(f"  Warning: Could not delete duplicate file: {e}")
-                    
-                    # Don't log as successful download
-                    print(f"  Skipping duplicate content for URL: {url[:60]}...")
-                    return False, None
+                # Check for duplicate content (one worker at a time, so two
+                # identical files finishing together can't both be kept)
+                with self._dedupe_lock:
+                    is_duplicate, existing_file = self.check_duplicate_content(file_path)
+                    if is_duplicate:
+                        print(f"\n⚠ Duplicate video detected! Removing {downloaded_file}")
+                        print(f"  Identical content already exists as: {existing_file}")
+                        try:
+                            os.remove(file_path)
+                            self.hash_index.remove(file_path)
+                            print(f"  ✓ Deleted duplicate file")
+                        except Exception as e:
+                            print(f"  Warning: Could not delete duplicate file: {e}")
+                        
+                        # Don't log as successful download
+                        print(f"  Skipping duplicate content for URL: {url[:60]}...")
+                        self._job.error_output = f'Duplicate content of {existing_file}'
+                        return False, None
                 
                 print(f"\n✓ Download successful!")
                 print(f"  Saved as: {downloaded_file}")
@@ -226,8 +466,8 @@ class VideoProcessor:
                 print(f"\n✗ Download failed!")
                 
                 # Show error details
-                if result.stderr:
-                    error_lines = result.stderr.strip().split('\n')
+                if error_output:
+                    error_lines = error_output.strip().split('\n')
                     # Show last few error lines
                     print(f"  Error details:")
                     for line in error_lines[-3:]:
@@ -235,16 +475,20 @@ class VideoProcessor:
                             print(f"    {line.strip()}")
                 
                 # Common error messages
-                if 'Unsupported URL' in result.stderr:
+                category = classify_error(error_output)
+                if category == 'unsupported_url':
                     print(f"\n  💡 Tip: This URL might not be supported by yt-dlp")
                     print(f"     Try copying the direct video URL instead of the page URL")
-                elif '403' in result.stderr or 'Forbidden' in result.stderr:
+                elif category == 'expired_link':
+                    print(f"\n  💡 Tip: The signed link has expired. Re-run the scraper for a fresh one")
+                elif category in ('forbidden', 'private'):
                     print(f"\n  💡 Tip: Access forbidden. The video might be private or region-locked")
-                elif '404' in result.stderr or 'Not Found' in result.stderr:
+                elif category == 'not_found':
                     print(f"\n  💡 Tip: Video not found. Check if the URL is correct")
                 
                 # Log the failed download
                 self.save_downloaded_log(url, None, success=False)
+                self._job.error_output = error_output
                 
                 return False, None
         
@@ -255,55 +499,164 @@ class VideoProcessor:
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
             self.save_downloaded_log(url, None, success=False)
+            self._job.error_output = str(e)
             return False, None
     
+    def scheduled_download(self, url, custom_filename=None):
+        """download_video under the scheduler's rate limits, backoff and circuit breaker"""
+        def attempt():
+            success, filename = self.download_video(url, custom_filename)
+            return success, filename, self._job.error_output
+        return self.scheduler.run(url, attempt)
+    
+    def queued_download(self, url, custom_filename=None):
+        """scheduled_download while holding the URL's lease in the download queue"""
+        outcome, filename = self.queued_download_outcome(url, custom_filename)
+        return outcome == 'success', filename
+    
+    def queued_download_outcome(self, url, custom_filename=None):
+        """queued_download, returning ('success' | 'failed' | 'expired' | 'skipped', filename)"""
+        # A signed link can run out while it waits its turn
+        if is_expired(url, self.expiry_margin):
+            print(f"⌛ Link expired before its turn, skipping: {url[:60]}")
+            self.expire_urls([url])
+            return 'expired', None
+        
+        stem, resumed = self.queue.claim(url, self.build_output_stem(custom_filename))
+        if stem is None:
+            print(f"⊘ Already done or leased by another worker: {url[:60]}")
+            return 'skipped', None
+        if resumed:
+            print(f"↻ Resuming earlier attempt for {url[:60]} ({stem})")
+        self.url_store.set_status([url], DOWNLOADING)
+        
+        self._job.stem, self._job.resumed = stem, resumed
+        success, filename = False, None
+        try:
+            success, filename = self.scheduled_download(url, custom_filename)
+        finally:
+            self._job.stem, self._job.resumed = None, False
+            if success or self.download_log.is_downloaded(url):
+                self.queue.complete(url)
+                self.url_store.set_status([url], DOWNLOADED, filename)
+                self.pipeline_status.record_activity('download', filename or url[:60])
+            else:
+                state = self.record_queue_failure(url, getattr(self._job, 'error_output', None))
+                self.url_store.set_status([url], FAILED if state == DEAD else PENDING)
+        return ('success' if success else 'failed'), filename
+    
+    def record_queue_failure(self, url, error_output):
+        # Permanent failures are dead-lettered now; transient ones come back
+        # next run until the retry budget is spent
+        category = classify_error(error_output) if error_output else None
+        state = self.queue.fail(url, error_output, category, permanent=is_permanent(category))
+        if state == DEAD:
+            print(f"☠ Dead-lettered ({category}): {url[:60]}")
+        return state
+    
+    def prepare_queue(self, urls, include_unfinished=False):
+        """Queue urls, recover jobs orphaned by a crash and drop abandoned partials.
+        
+        Returns the batch order: signed links earliest-expiry first, then
+        the rest with interrupted jobs (partial files) first. Dead-lettered
+        and already expired links are left out.
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"↻ Recovered {len(recovered)} interrupted download(s) from an earlier run")
+        self.queue.enqueue(urls)
+        self.cleanup_partial_files()
+        
+        unfinished = self.queue.unfinished()
+        if not include_unfinished:
+            wanted = set(urls)
+            unfinished = [url for url in unfinished if url in wanted]
+        first = set(unfinished)
+        batch = unfinished + [url for url in urls if url not in first]
+        
+        # Dead-lettered URLs are skipped without starting yt-dlp
+        dead = self.queue.dead_urls()
+        skipped = sum(1 for url in set(batch) if url in dead)
+        if skipped:
+            print(f"☠ Skipping {skipped} dead-lettered URL(s) (see --dead-letter)")
+        batch = [url for url in batch if url not in dead]
+        
+        # Links that expire before they could finish go back to the scraper
+        expired = [
+            url for url in dict.fromkeys(batch)
+            if is_expired(url, self.expiry_margin) and not self.download_log.is_downloaded(url)
+        ]
+        if expired:
+            self.expire_urls(expired)
+            expired = set(expired)
+            batch = [url for url in batch if url not in expired]
+        
+        # Earliest deadline first; unsigned links keep their order behind them
+        deadlines = {url: parse_url_expiry(url) for url in batch}
+        batch.sort(key=lambda url: (deadlines[url] is None, deadlines[url] or 0))
+        return batch
+    
+    def expire_urls(self, urls):
+        """Dead-letter links whose signature ran out and mark them 'expired' in the URL store"""
+        self.queue.dead_letter(urls, 'expired_link', 'Signed link expired before download')
+        marked = self.url_store.set_status(urls, EXPIRED)
+        # Let the scraper accept freshly signed links to the same videos
+        SeenIndex(self.url_store.db_file).discard_many(urls)
+        print(f"⌛ {len(urls)} link(s) expired before download"
+              f"{'; marked expired for the scraper to refresh' if marked else ''}")
+    
+    def cleanup_partial_files(self):
+        """Delete .part/.ytdl leftovers that no queued job will resume"""
+        active_stems = self.queue.active_stems()
+        now = time.time()
+        removed, freed = 0, 0
+        for filename in os.listdir(self.output_folder):
+            if not is_partial_file(filename):
+                continue
+            if any(filename.startswith(stem) for stem in active_stems):
+                continue
+            path = os.path.join(self.output_folder, filename)
+            try:
+                stat = os.stat(path)
+                if now - stat.st_mtime < PARTIAL_GRACE_SECONDS:
+                    continue
+                os.remove(path)
+            except OSError as e:
+                print(f"  Warning: Could not remove partial file {filename}: {e}")
+                continue
+            removed += 1
+            freed += stat.st_size
+        if removed:
+            print(f"🧹 Removed {removed} abandoned partial file(s), {freed / (1024 * 1024):.1f} MB")
+        return removed
+    
+    def print_scheduler_state(self):
+        state = self.scheduler.get_state()
+        troubled = {h: s for h, s in state.items() if s['failures'] or s['circuit'] != 'closed'}
+        if not troubled:
+            return
+        print(f"Host status:")
+        for host, s in troubled.items():
+            print(f"  • {host}: circuit {s['circuit']}, {s['successes']} ok / {s['failures']} failed, "
+                  f"{s['consecutive_blocks']} blocked in a row, backoff {s['backoff_remaining']}s")
+        print()
+    
     def download_from_url_list(self, urls=None):
-        if urls is None:
-            # Load URLs from Excel file (created by scraper)
-            if not os.path.exists(self.urls_file):
-                print(f"✗ Error: {self.urls_file} not found!")
+        from_store = urls is None
+        if from_store:
+            # Pending URLs from the URL store (filled by the scraper)
+            if not len(self.url_store):
+                print(f"✗ Error: No scraped URLs in {self.url_store.db_file}!")
                 print(f"  Run the scraper first to generate URLs")
-                return {'success': 0, 'failed': 0, 'skipped': 0}
-            
-            try:
-                import pandas as pd
-                # Read Excel file with proper encoding
-                df = pd.read_excel(self.urls_file, engine='openpyxl')
-                
-                # Filter for URLs with 'pending' status
-                if 'status' in df.columns and 'url' in df.columns:
-                    pending_df = df[df['status'] == 'pending']
-                    urls = pending_df['url'].dropna().tolist()
-                elif 'url' in df.columns:
-                    # If no status column, use all URLs
-                    urls = df['url'].dropna().tolist()
-                else:
-                    print(f"✗ Error: No 'url' column found in {self.urls_file}")
-                    return {'success': 0, 'failed': 0, 'skipped': 0}
-                    
-            except UnicodeDecodeError:
-                # Try with different encoding if default fails
-                try:
-                    import pandas as pd
-                    df = pd.read_excel(self.urls_file, engine='openpyxl')
-                    if 'status' in df.columns and 'url' in df.columns:
-                        pending_df = df[df['status'] == 'pending']
-                        urls = pending_df['url'].dropna().tolist()
-                    elif 'url' in df.columns:
-                        urls = df['url'].dropna().tolist()
-                    else:
-                        print(f"✗ Error: No 'url' column found in {self.urls_file}")
-                        return {'success': 0, 'failed': 0, 'skipped': 0}
-                except Exception as e:
-                    print(f"✗ Error reading Excel file with UTF-8: {e}")
-                    return {'success': 0, 'failed': 0, 'skipped': 0}
-            except Exception as e:
-                print(f"✗ Error reading {self.urls_file}: {e}")
-                return {'success': 0, 'failed': 0, 'skipped': 0}
+                return {'success': 0, 'failed': 0, 'expired': 0, 'skipped': 0}
+            urls = self.url_store.pending_urls()
+        
+        # Jobs left unfinished by an earlier batch run rejoin a store batch
+        urls = self.prepare_queue(urls, include_unfinished=from_store)
         
         if not urls:
             print("⚠ No URLs to download!")
-            return {'success': 0, 'failed': 0, 'skipped': 0}
+            return {'success': 0, 'failed': 0, 'expired': 0, 'skipped': 0}
         
         print(f"\n{'#'*60}")
         print(f"# Batch Download Started")
@@ -311,50 +664,144 @@ class VideoProcessor:
         print(f"# Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'#'*60}\n")
         
-        # Load download history
-        downloaded_log = self.load_downloaded_log()
         stats = {
             'success': 0,
             'failed': 0,
+            'expired': 0,
             'skipped': 0,
             'downloaded_files': []
         }
         
+        if self.max_workers > 1:
+            self._download_concurrently(urls, stats)
+            self.hash_index.save()
+            self._print_download_summary(stats, len(urls))
+            return stats
+        
         for i, url in enumerate(urls, 1):
             print(f"\n{'─'*60}")
             print(f"[{i}/{len(urls)}] Processing URL...")
             print(f"{'─'*60}")
             
             # Skip if already downloaded successfully
-            if url in downloaded_log and downloaded_log[url].get('success'):
-                filename = downloaded_log[url].get('filename', 'unknown')
+            existing_entry = self.download_log.get(url)
+            if existing_entry and existing_entry.get('success'):
+                filename = existing_entry.get('filename') or 'unknown'
                 print(f"⊘ Already downloaded: {filename}")
                 print(f"  Skipping...")
                 stats['skipped'] += 1
                 continue
             
-            # Download video
-            success, filename = self.download_video(url)
+            # Leave paused hosts (open circuit) for a later run
+            if self.scheduler.is_paused(self.get_url_host(url)):
+                print(f"⏸ Host paused after repeated 403/429 responses, deferring")
+                stats['skipped'] += 1
+                continue
             
-            if success:
-                stats['success'] += 1
-                stats['downloaded_files'].append(filename)
-            else:
-                stats['failed'] += 1
+            # Download video (pacing between requests is left to the scheduler)
+            outcome, filename = self.queued_download_outcome(url)
             
-            # Small delay between downloads
-            if i < len(urls):
-                import time
-                time.sleep(1)
+            stats[outcome] += 1
+            if outcome == 'success':
+                stats['downloaded_files'].append(filename)
+        
+        self.hash_index.save()
+        self._print_download_summary(stats, len(urls))
+        return stats
+    
+    def _download_concurrently(self, urls, stats):
+        # Group pending URLs per host so the per-host cap can be enforced
+        # without parking worker threads on a busy host
+        pending_by_host = OrderedDict()
+        queued = set()
+        deadlines = {}
+        for url in urls:
+            if url in queued or self.download_log.is_downloaded(url):
+                stats['skipped'] += 1
+                continue
+            queued.add(url)
+            deadlines[url] = parse_url_expiry(url)
+            pending_by_host.setdefault(self.get_url_host(url), deque()).append(url)
+        
+        print(f"Running {len(queued)} downloads with {self.max_workers} workers "
+              f"(max {self.per_host_limit} per host)...")
         
+        in_flight = {}
+        host_counts = {}
+        completed = 0
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending_by_host or in_flight:
+                # Fill free slots across hosts that are under their cap and not
+                # paused by the scheduler (backoff / open circuit), visiting the
+                # host whose next link expires soonest first
+                next_ready = None
+                submitted = True
+                while submitted and len(in_flight) < self.max_workers:
+                    submitted = False
+                    hosts = sorted(pending_by_host, key=lambda h: (
+                        deadlines[pending_by_host[h][0]] is None, deadlines[pending_by_host[h][0]] or 0
+                    ))
+                    for host in hosts:
+                        if len(in_flight) >= self.max_workers:
+                            break
+                        if host_counts.get(host, 0) >= self.per_host_limit:
+                            continue
+                        ready_in = self.scheduler.ready_in(host)
+                        if ready_in > 0:
+                            next_ready = ready_in if next_ready is None else min(next_ready, ready_in)
+                            continue
+                        url = pending_by_host[host].popleft()
+                        if not pending_by_host[host]:
+                            del pending_by_host[host]
+                        host_counts[host] = host_counts.get(host, 0) + 1
+                        in_flight[executor.submit(self.queued_download_outcome, url)] = (url, host)
+                        submitted = True
+                
+                if not in_flight:
+                    paused = [h for h in pending_by_host if self.scheduler.is_paused(h)]
+                    if len(paused) == len(pending_by_host):
+                        # Only hosts with an open circuit are left: defer them to
+                        # a later run instead of waiting out the cooldown
+                        for host in paused:
+                            deferred = len(pending_by_host.pop(host))
+                            stats['skipped'] += deferred
+                            print(f"⏸ {host} paused after repeated 403/429 responses, "
+                                  f"deferring {deferred} URL(s)")
+                        continue
+                    # Remaining hosts are only in backoff or out of tokens
+                    time.sleep(min(next_ready or 1.0, 5.0))
+                    continue
+                
+                done, _ = wait(list(in_flight), timeout=next_ready, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host = in_flight.pop(future)
+                    host_counts[host] -= 1
+                    completed += 1
+                    
+                    try:
+                        outcome, filename = future.result()
+                    except Exception as e:
+                        print(f"\n✗ Worker error for {url[:60]}: {e}")
+                        outcome, filename = 'failed', None
+                    
+                    stats[outcome] += 1
+                    if outcome == 'success':
+                        stats['downloaded_files'].append(filename)
+                    
+                    icon = {'success': '✓', 'expired': '⌛', 'skipped': '⊘'}.get(outcome, '✗')
+                    print(f"[{completed}/{len(queued)}] {icon} {url[:60]}")
+    
+    def _print_download_summary(self, stats, total):
         # Print summary
         print(f"\n{'='*60}")
         print(f"Download Summary:")
         print(f"{'='*60}")
         print(f"  ✓ Successful: {stats['success']}")
         print(f"  ✗ Failed: {stats['failed']}")
+        print(f"  ⌛ Expired: {stats['expired']}")
         print(f"  ⊘ Skipped: {stats['skipped']}")
-        print(f"  Total processed: {len(urls)}")
+        print(f"  Total processed: {total}")
         print(f"{'='*60}\n")
         
         if stats['downloaded_files']:
@@ -363,49 +810,39 @@ class VideoProcessor:
                 print(f"  • {file}")
             print()
         
-        return stats
+        self.print_scheduler_state()
     
     def download_single_url(self, url, filename=None):
-        success, downloaded_file = self.download_video(url, filename)
+        success, downloaded_file = self.queued_download(url, filename)
+        self.hash_index.save()
         return success
     
     def get_downloaded_count(self):
-        log = self.load_downloaded_log()
-        return len([v for v in log.values() if v.get('success')])
+        return self.download_log.success_count()
     
     def get_pending_urls(self):
-        if not os.path.exists(self.urls_file):
-            return []
-        
-        try:
-            with open(self.urls_file, 'r') as f:
-                data = json.load(f)
-                all_urls = data.get('scraped_urls', [])
-            
-            downloaded_log = self.load_downloaded_log()
-            pending = [
-                url for url in all_urls
-                if url not in downloaded_log or not downloaded_log[url].get('success')
-            ]
-            return pending
-        except:
-            return []
+        return self.url_store.pending_urls()
     
     def clear_failed_downloads(self):
-        log = self.load_downloaded_log()
-        cleaned = {k: v for k, v in log.items() if v.get('success')}
-        
-        data = {
-            'downloads': cleaned,
-            'total_downloads': len(cleaned),
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        with open(self.downloaded_log, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        removed = len(log) - len(cleaned)
+        removed = self.download_log.clear_failed()
         print(f"✓ Removed {removed} failed download entries from log")
+    
+    def show_dead_letters(self):
+        entries = self.queue.dead_letters()
+        print(f"\n☠ Dead-lettered URLs ({len(entries)}):")
+        by_category = {}
+        for entry in entries:
+            by_category.setdefault(entry['error_category'], []).append(entry)
+        for category, group in by_category.items():
+            print(f"\n  {category} ({len(group)}):")
+            for entry in group:
+                print(f"    • {entry['url'][:70]}{'...' if len(entry['url']) > 70 else ''} "
+                      f"({entry['attempts']} attempt(s))")
+        print()
+    
+    def retry_dead_letters(self, category=None):
+        requeued = self.queue.requeue_dead(category)
+        print(f"✓ Re-queued {requeued} dead-lettered URL(s){f' ({category})' if category else ''}")
 
 
 def main():
@@ -413,16 +850,31 @@ def main():
     
     parser = argparse.ArgumentParser(description='Video Downloader for Meta AI Videos')
     parser.add_argument('--url', type=str, help='Single URL to download')
-    parser.add_argument('--batch', action='store_true', help='Download all URLs from video_urls.xlsx')
+    parser.add_argument('--batch', action='store_true', help='Download all pending scraped URLs')
     parser.add_argument('--output', type=str, default='videos', help='Output folder')
     parser.add_argument('--filename', type=str, help='Custom filename for single download')
     parser.add_argument('--stats', action='store_true', help='Show download statistics')
     parser.add_argument('--pending', action='store_true', help='Show pending URLs')
     parser.add_argument('--clear-failed', action='store_true', help='Clear failed downloads from log')
+    parser.add_argument('--dead-letter', action='store_true', help='Show dead-lettered URLs by error category')
+    parser.add_argument('--retry-dead', nargs='?', const='all', metavar='CATEGORY',
+                        help='Re-queue dead-lettered URLs (all, or only one error category)')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel downloads for batch mode (default: 1)')
+    parser.add_argument('--per-host', type=int, default=4, help='Max parallel downloads per host (default: 4)')
+    parser.add_argument('--engine', choices=['auto', 'api', 'subprocess'], default='auto',
+                        help='yt-dlp engine: in-process API or one process per URL (default: auto)')
+    parser.add_argument('--no-direct', action='store_true',
+                        help='Send direct media links through yt-dlp instead of the HTTP fast path')
     
     args = parser.parse_args()
     
-    downloader = VideoProcessor(output_folder=args.output)
+    downloader = VideoProcessor(
+        output_folder=args.output,
+        max_workers=args.workers,
+        per_host_limit=args.per_host,
+        engine=args.engine,
+        direct_downloads=not args.no_direct
+    )
     
     if args.stats:
         # Show statistics
@@ -444,6 +896,12 @@ def main():
         # Clear failed downloads
         downloader.clear_failed_downloads()
     
+    elif args.dead_letter:
+        downloader.show_dead_letters()
+    
+    elif args.retry_dead:
+        downloader.retry_dead_letters(None if args.retry_dead == 'all' else args.retry_dead)
+    
     elif args.url:
         # Download single URL
         print("Downloading single video...")
@@ -451,12 +909,12 @@ def main():
     
     elif args.batch:
         # Batch download from file
-        print("Batch downloading from video_urls.xlsx...")
+        print("Batch downloading pending scraped URLs...")
         stats = downloader.download_from_url_list()
     
     else:
         # Default: batch download
-        print("Downloading videos from video_urls.xlsx...")
+        print("Downloading pending scraped URLs...")
         print("(Use --help to see all options)\n")
         stats = downloader.download_from_url_list()
 
@@ -1,67 +1,104 @@
-import os
-import json
-import time
-from datetime import datetime
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-import pandas as pd
+import re
+
+from url_index import canonical_url_key
+from url_store import UrlStore, PENDING, EXPIRED
+from pipeline_status import PipelineStatus
+
+VIDEO_URL_PATTERNS = [
+    r'https://[^"\']*\.(?:mp4|mov|avi|mkv|webm)[^"\'\s]*',
+    r'"(https://[^"]*\.(?:mp4|mov|avi|mkv|webm)[^"]*)"',
+    r"'(https://[^']*\.(?:mp4|mov|avi|mkv|webm)[^']*)'"
+]
+
+
+def find_video_urls_in_html(content, urls):
+    """Append meta.ai video URLs found in page source to urls (skipping ones already there)"""
+    for pattern in VIDEO_URL_PATTERNS:
+        for match in re.findall(pattern, content):
+            if match not in urls and 'meta.ai' in match and not match.startswith('blob:'):
+                urls.append(match)
+    return urls
+
 
 class VideoScraper:
-    def __init__(self, urls_file='video_urls.xlsx'):
+    def __init__(self, urls_file='video_urls.xlsx', url_db='downloaded_log.db', parallel_pages=1, follow_posts=False,
+                 capture_mode='hybrid', pagination='replay', max_idle_polls=3,
+                 page_load_timeout=5, scroll_timeout=4, click_timeout=3, lean=True,
+                 browser_service=None, seen_index=None):
         self.urls_file = urls_file
+        # Scraped URLs go to the SQLite URL store shared with the downloader;
+        # urls_file (the old spreadsheet) is imported into it once
+        self.url_store = UrlStore(url_db, import_from=urls_file)
+        self.pipeline_status = PipelineStatus(url_db, url_store=self.url_store)
         self.scraped_urls = []
+        # Pages crawled at once; with follow_posts, post links found on the
+        # feed are visited by the other pages
+        self.parallel_pages = parallel_pages
+        self.follow_posts = follow_posts
+        # Where video URLs come from: 'dom', 'network' or 'hybrid' (see AsyncVideoScraper)
+        self.capture_mode = capture_mode
+        # 'replay' pages the feed through its own API once seen, 'scroll' only scrolls
+        self.pagination = pagination
+        # Stop scrolling a page after this many polls in a row find nothing new
+        self.max_idle_polls = max_idle_polls
+        # Upper bounds (seconds) on waiting for new content after each step
+        self.page_load_timeout = page_load_timeout
+        self.scroll_timeout = scroll_timeout
+        self.click_timeout = click_timeout
+        # Skip images, fonts, trackers and video bodies while scraping
+        self.lean = lean
+        # Warm browser (browser_pool.BrowserService) kept between runs, if any
+        self.browser_service = browser_service
+        # Persistent url_index.SeenIndex of canonical keys; without one the
+        # URL store is read on every run
+        self.seen_index = seen_index
         
     def load_existing_urls(self):
-        if os.path.exists(self.urls_file):
-            try:
-                df = pd.read_excel(self.urls_file)
-                if 'url' in df.columns:
-                    return set(df['url'].dropna().tolist())
-                return set()
-            except Exception as e:
-                print(f"Warning: Could not read existing URLs from {self.urls_file}: {e}")
-                return set()
-        return set()
+        return set(self.url_store.all_urls())
+    
+    def seen_keys(self):
+        """Canonical keys of every URL scraped before, except links that expired"""
+        if self.seen_index is None:
+            return {canonical_url_key(url) for url in self.url_store.live_urls()}
+        if self.seen_index.is_empty():
+            existing_urls = self.url_store.live_urls()
+            if existing_urls:
+                added = self.seen_index.add_many(existing_urls)
+                self.seen_index.save()
+                print(f"✓ Indexed {added} existing URLs from {self.url_store.db_file}")
+        return self.seen_index
     
     def save_urls(self, urls):
-        existing_urls = self.load_existing_urls()
-        new_urls = set(urls) - existing_urls
-        
-        # Load existing data if file exists
-        if os.path.exists(self.urls_file):
-            try:
-                existing_df = pd.read_excel(self.urls_file)
-                if 'url' in existing_df.columns and 'status' in existing_df.columns:
-                    # Keep existing URLs with their current status
-                    existing_data = existing_df.copy()
-                else:
-                    # Recreate if columns are missing
-                    existing_data = pd.DataFrame(columns=['url', 'scraped_date', 'status'])
-            except Exception as e:
-                print(f"Warning: Could not read existing data: {e}")
-                existing_data = pd.DataFrame(columns=['url', 'scraped_date', 'status'])
+        # New means a new asset, not just a freshly signed link to a known one
+        if self.seen_index is not None:
+            known = self.seen_index
         else:
-            existing_data = pd.DataFrame(columns=['url', 'scraped_date', 'status'])
-        
-        # Add new URLs with 'pending' status
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        new_data = pd.DataFrame({
-            'url': list(new_urls),
-            'scraped_date': [current_time] * len(new_urls),
-            'status': ['pending'] * len(new_urls)
-        })
+            known = {canonical_url_key(url) for url in self.url_store.live_urls()}
+        # A fresh link to a video whose old link expired takes over its row
+        expired = {canonical_url_key(url): url for url in self.url_store.urls_with_status(EXPIRED)}
+        seen = set()
+        new_urls = []
+        for url in urls:
+            key = canonical_url_key(url)
+            if key not in seen and key not in known:
+                seen.add(key)
+                new_urls.append(url)
         
-        # Combine existing and new data
-        combined_df = pd.concat([existing_data, new_data], ignore_index=True)
+        # Appended as 'pending' for the downloader
+        replaced = [expired[key] for key in map(canonical_url_key, new_urls) if key in expired]
+        added = self.url_store.add_urls(new_urls, replaces=replaced)
+        counts = self.url_store.status_counts()
         
-        # Remove duplicates based on URL, keeping the first occurrence
-        combined_df = combined_df.drop_duplicates(subset=['url'], keep='first')
+        print(f"✓ Saved {added} new URLs to {self.url_store.db_file}")
+        if replaced:
+            print(f"  Refreshed {len(replaced)} expired links")
+        print(f"  Total unique URLs: {sum(counts.values())}")
+        print(f"  Pending downloads: {counts.get(PENDING, 0)}")
         
-        # Save to Excel
-        combined_df.to_excel(self.urls_file, index=False, engine='openpyxl')
-        
-        print(f"✓ Saved {len(new_urls)} new URLs to {self.urls_file}")
-        print(f"  Total unique URLs: {len(combined_df)}")
-        print(f"  Pending downloads: {len(combined_df[combined_df['status'] == 'pending'])}")
+        if self.seen_index is not None:
+            self.seen_index.add_many(new_urls)
+            self.seen_index.save()
+        self.pipeline_status.record_activity('scrape', f'{added} new URLs')
     
     def extract_video_url_from_post(self, page):
         try:
@@ -104,7 +141,10 @@ class VideoScraper:
         urls = []
         try:
             # Wait for content to load
-            page.wait_for_timeout(3000)
+            try:
+                page.wait_for_selector('video, [data-video-url], [data-src]', state='attached', timeout=3000)
+            except Exception:
+                pass
             
             # Method 1: Find direct video elements
             video_elements = page.query_selector_all('video')
@@ -123,19 +163,7 @@ class VideoScraper:
                     urls.append(video_url)
             
             # Method 3: Look for video URLs in page source
-            content = page.content()
-            import re
-            video_patterns = [
-                r'https://[^"\']*\.(?:mp4|mov|avi|mkv|webm)[^"\'\s]*',
-                r'"(https://[^"]*\.(?:mp4|mov|avi|mkv|webm)[^"]*)"',
-                r"'(https://[^']*\.(?:mp4|mov|avi|mkv|webm)[^']*)'"
-            ]
-            
-            for pattern in video_patterns:
-                matches = re.findall(pattern, content)
-                for match in matches:
-                    if match not in urls and 'meta.ai' in match and not match.startswith('blob:'):
-                        urls.append(match)
+            find_video_urls_in_html(page.content(), urls)
             
             # Remove duplicates
             urls = list(set(urls))
@@ -146,87 +174,45 @@ class VideoScraper:
             print(f"  Error extracting video URLs: {e}")
             return []
     
-    def scrape_meta_ai_videos(self, start_url, num_videos=10, headless=False):
+    def scrape_meta_ai_videos(self, start_url, num_videos=10, headless=False, start_urls=None):
+        # Extra feed sections are crawled alongside start_url
+        start_urls = [start_url] + [url for url in (start_urls or []) if url != start_url]
+        
         print(f"\n{'='*60}")
         print(f"Starting Meta AI Vibes Video Scraper")
         print(f"{'='*60}")
         print(f"Target: {num_videos} videos")
-        print(f"Start URL: {start_url}\n")
+        print(f"Start URL: {start_url}")
+        if len(start_urls) > 1:
+            print(f"Extra start URLs: {len(start_urls) - 1}")
+        print(f"Parallel pages: {self.parallel_pages}\n")
         
-        scraped_urls = []
-        existing_urls = self.load_existing_urls()
+        seen_keys = self.seen_keys()
         
-        with sync_playwright() as p:
-            # Launch browser
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context(
-                viewport={'width': 1280, 'height': 720},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            page = context.new_page()
-            
-            try:
-                # Navigate to vibes page
-                print(f"Loading vibes page...")
-                page.goto(start_url, wait_until='domcontentloaded', timeout=30000)
-                time.sleep(5)  # Wait for dynamic content
-                
-                videos_found = 0
-                scroll_attempts = 0
-                max_scroll_attempts = 20  # Reduced since we want exactly 20 videos
-                
-                while videos_found < num_videos and scroll_attempts < max_scroll_attempts:
-                    print(f"\nScroll attempt {scroll_attempts + 1}/{max_scroll_attempts}")
-                    
-                    # Extract all post URLs currently visible on page
-                    current_urls = self.extract_all_video_urls_from_page(page)
-                    
-                    for url in current_urls:
-                        if url not in existing_urls and url not in scraped_urls:
-                            scraped_urls.append(url)
-                            videos_found += 1
-                            
-                            # Stop immediately when we reach the target
-                            if videos_found >= num_videos:
-                                break
-                    
-                    if videos_found >= num_videos:
-                        break
-                    
-                    # Scroll down to load more posts
-                    print(f"  Scrolling to load more posts...")
-                    
-                    # Try different scroll methods
-                    try:
-                        # Scroll by larger amount to load more content
-                        page.evaluate('window.scrollBy(0, 1200)')
-                        time.sleep(4)  # Longer wait for content to load
-                        
-                        # Try clicking "Load more" or similar buttons if they exist
-                        load_more_buttons = page.query_selector_all('button:has-text("Load"), button:has-text("More"), [aria-label*="Load"]')
-                        for button in load_more_buttons:
-                            try:
-                                button.click()
-                                time.sleep(3)
-                            except:
-                                pass
-                                
-                    except Exception as e:
-                        print(f"  Warning: Scroll error: {e}")
-                    
-                    scroll_attempts += 1
-                
-                print(f"\n{'='*60}")
-                print(f"Scraping Complete!")
-                print(f"  Videos found: {videos_found}/{num_videos}")
-                print(f"{'='*60}\n")
-                
-            except PlaywrightTimeout:
-                print("\n✗ Error: Page load timeout. Check your internet connection.")
-            except Exception as e:
-                print(f"\n✗ Error during scraping: {e}")
-            finally:
-                browser.close()
+        from async_scraper import AsyncVideoScraper
+        engine = AsyncVideoScraper(
+            parallel_pages=self.parallel_pages,
+            headless=headless,
+            follow_posts=self.follow_posts,
+            capture_mode=self.capture_mode,
+            pagination=self.pagination,
+            max_idle_polls=self.max_idle_polls,
+            page_load_timeout=self.page_load_timeout,
+            scroll_timeout=self.scroll_timeout,
+            click_timeout=self.click_timeout,
+            lean=self.lean,
+            browser_service=self.browser_service
+        )
+        try:
+            scraped_urls = engine.scrape(start_urls, num_videos, seen_keys)
+        except Exception as e:
+            print(f"\n✗ Error during scraping: {e}")
+            scraped_urls = []
+        
+        print(f"\n{'='*60}")
+        print(f"Scraping Complete!")
+        print(f"  Videos found: {len(scraped_urls)}/{num_videos}")
+        print(f"{'='*60}\n")
         
         # Save URLs
         if scraped_urls:
@@ -235,19 +221,7 @@ class VideoScraper:
         return scraped_urls
     
     def get_pending_urls(self):
-        if not os.path.exists(self.urls_file):
-            return []
-        
-        try:
-            df = pd.read_excel(self.urls_file)
-            if 'url' in df.columns:
-                # Filter for URLs that haven't been downloaded (status != 'downloaded')
-                pending_df = df[df['status'] != 'downloaded']
-                return pending_df['url'].dropna().tolist()
-            return []
-        except Exception as e:
-            print(f"Warning: Could not read pending URLs: {e}")
-            return []
+        return self.url_store.pending_urls()
 
 
 def main():
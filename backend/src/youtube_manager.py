@@ -1,19 +1,26 @@
 import os
 import pickle
-import schedule
 import time
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
-from googleapiclient.discovery import build  # type: ignore
-from googleapiclient.http import MediaFileUpload  # type: ignore
-from googleapiclient.errors import HttpError  # type: ignore
-from hachoir.metadata import extractMetadata  # type: ignore
-from hachoir.parser import createParser  # type: ignore
 import config
 
+# The Google client libraries, hachoir and schedule are imported by the
+# methods that use them: they take a few hundred ms to load, and callers
+# like `main.py --mode status` only need to list the videos folder.
+
+# Errors after which no further upload can succeed today
+QUOTA_ERRORS = ('quotaExceeded', 'uploadLimitExceeded', 'dailyLimitExceeded')
+
+
+def is_quota_error(error):
+    """True if an HttpError says the daily quota or upload limit is used up"""
+    text = str(error) + (error.content or b'').decode('utf-8', 'replace')
+    return any(reason in text for reason in QUOTA_ERRORS)
+
+
 # API scopes
 SCOPES = [
     'https://www.googleapis.com/auth/youtube.upload',
@@ -21,7 +28,7 @@ SCOPES = [
 ]
 
 class YouTubeManager:
-    def __init__(self, credentials_file='credentials.json', videos_folder='videos'):
+    def __init__(self, credentials_file='credentials.json', videos_folder='videos', parallel_uploads=1):
         self.credentials_file = credentials_file
         self.token_file = 'token.pickle'
         self.videos_folder = videos_folder
@@ -29,11 +36,22 @@ class YouTubeManager:
         self.creds = None
         self.youtube = None
         
+        # Videos uploaded at once by upload_and_schedule_all_videos (1 = one after another)
+        self.parallel_uploads = parallel_uploads
+        # httplib2 isn't thread-safe, so each upload thread builds its own service
+        self._local = threading.local()
+        # Set by the first upload that runs out of quota; the others then stop
+        self._quota_exceeded = threading.Event()
+        
         # Create necessary folders
         os.makedirs(self.videos_folder, exist_ok=True)
         os.makedirs(self.uploaded_folder, exist_ok=True)
         
     def authenticate(self):
+        from google.auth.transport.requests import Request
+        from google_auth_oauthlib.flow import InstalledAppFlow  # type: ignore
+        from googleapiclient.discovery import build  # type: ignore
+
         # Load saved credentials
         if os.path.exists(self.token_file):
             with open(self.token_file, 'rb') as token:
@@ -55,13 +73,23 @@ class YouTubeManager:
         # Build YouTube service
         self.youtube = build('youtube', 'v3', credentials=self.creds)
         print("✓ Authentication successful!")
+
+    def get_thread_service(self):
+        """A YouTube service with its own authorized HTTP transport, one per upload thread"""
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp  # type: ignore
+        from googleapiclient.discovery import build  # type: ignore
+
+        service = getattr(self._local, 'youtube', None)
+        if service is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http())
+            service = self._local.youtube = build('youtube', 'v3', http=http)
+        return service
     
     def get_video_files(self):
-        video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.3gp')
-        
         video_files = [
             f for f in os.listdir(self.videos_folder)
-            if f.lower().endswith(video_extensions) and os.path.isfile(os.path.join(self.videos_folder, f))
+            if f.lower().endswith(config.VIDEO_EXTENSIONS) and os.path.isfile(os.path.join(self.videos_folder, f))
         ]
         
         # Sort by creation time (oldest first)
@@ -71,6 +99,8 @@ class YouTubeManager:
     
     def generate_title(self, filename):
         import random
+        from hachoir.metadata import extractMetadata  # type: ignore
+        from hachoir.parser import createParser  # type: ignore
 
         # Try to extract title from video metadata first
         video_path = os.path.join(self.videos_folder, filename)
@@ -407,6 +437,9 @@ class YouTubeManager:
     
     def upload_video(self, video_path, title, description, tags, category_id=None):
         """Upload video to YouTube"""
+        from googleapiclient.http import MediaFileUpload  # type: ignore
+        from googleapiclient.errors import HttpError  # type: ignore
+
         # Use config defaults if not specified
         if category_id is None:
             category_id = config.VIDEO_CATEGORY_ID
@@ -503,6 +536,7 @@ class YouTubeManager:
 
                 # Try to move the file
                 shutil.move(source, destination)
+                self.record_move_in_hash_index(source, destination)
                 print(f"✓ Moved to uploaded folder: {filename}")
                 return
 
@@ -524,6 +558,7 @@ class YouTubeManager:
                         # Then try to delete source
                         time.sleep(2)
                         os.remove(source)
+                        self.record_move_in_hash_index(source, destination)
                         print(f"✓ Deleted source file: {filename}")
 
                     except Exception as copy_e:
@@ -539,6 +574,28 @@ class YouTubeManager:
                         except Exception as marker_e:
                             print(f"⚠ Could not create marker file: {marker_e}")
 
+    def record_upload(self, filename):
+        """Mark the URL the video was downloaded from as uploaded in the URL store"""
+        from pipeline_status import PipelineStatus
+
+        try:
+            status = PipelineStatus(config.DOWNLOAD_LOG_DB)
+            status.url_store.mark_uploaded(filename)
+            status.record_activity('upload', filename)
+        except Exception as e:
+            print(f"  Warning: Could not update URL store: {e}")
+
+    def record_move_in_hash_index(self, source, destination):
+        """Point the downloader's duplicate index at the file's new location"""
+        from video_processor import ContentHashIndex
+
+        try:
+            index = ContentHashIndex(config.HASH_INDEX_FILE)
+            index.move(source, destination)
+            index.save()
+        except Exception as e:
+            print(f"  Warning: Could not update hash index: {e}")
+
     def cleanup_uploaded_files(self):
         """Clean up any files that were uploaded but not moved properly"""
         import glob
@@ -568,6 +625,7 @@ class YouTubeManager:
                         destination = os.path.join(self.uploaded_folder, f"{name}_{timestamp}{ext}")
 
                     shutil.move(original_file, destination)
+                    self.record_move_in_hash_index(original_file, destination)
                     print(f"✓ Cleaned up: {filename}")
 
                     # Remove the marker file
@@ -623,6 +681,7 @@ class YouTubeManager:
         
         # If successful, move to uploaded folder
         if video_id:
+            self.record_upload(video_file)
             self.move_to_uploaded(video_file)
             remaining = len(video_files) - 1
             print(f"✓ Upload complete! {remaining} video(s) remaining in queue.\n")
@@ -630,7 +689,13 @@ class YouTubeManager:
             print(f"✗ Upload failed. Video remains in queue.\n")
 
     def upload_and_schedule_all_videos(self):
-        """Upload 5 videos per schedule cycle according to config times"""
+        """Upload 5 videos per schedule cycle according to config times.
+
+        Returns (uploaded, failed, skipped) counts: uploaded videos are moved
+        to the uploaded folder; failed ones and ones skipped because the API
+        quota ran out stay in the videos folder. (0, 0, 0) if there are no
+        videos or the quota check fails.
+        """
         from datetime import datetime, timedelta
         
         print(f"\n{'='*70}")
@@ -643,14 +708,14 @@ class YouTubeManager:
         if not video_files:
             print("⚠ No videos found in the 'videos' folder.")
             print("  Please add videos to upload and schedule.\n")
-            return 0, 0
+            return 0, 0, 0
         
         # Check YouTube API quota before proceeding
         print("🔍 Checking YouTube API quota status...")
         if not self.check_quota_status():
             print("❌ Cannot proceed with uploads due to quota limits.")
             print("   Please resolve quota issues and try again.\n")
-            return 0, 0
+            return 0, 0, 0
 
         # Clean up any files from previous failed uploads
         self.cleanup_uploaded_files()
@@ -663,19 +728,13 @@ class YouTubeManager:
         # Get today's date
         today = datetime.now().date()
         
-        uploaded_count = 0
-        failed_count = 0
-        
-        # Upload only the first 5 videos (one per upload time)
+        # Upload only the first 5 videos (one per upload time); metadata and
+        # publish times are prepared here so only the uploads run in parallel
         videos_to_upload = min(len(video_files), 5)
+        jobs = []
         
         for i in range(videos_to_upload):
             video_file = video_files[i]
-            
-            print(f"\n{'#'*60}")
-            print(f"Processing video {i+1}/{videos_to_upload}: {video_file[:50]}...")
-            print(f"{'#'*60}")
-            
             video_path = os.path.join(self.videos_folder, video_file)
             
             # Use the corresponding upload time from config
@@ -692,37 +751,65 @@ class YouTubeManager:
             if scheduled_datetime <= now:
                 scheduled_datetime = scheduled_datetime + timedelta(days=1)
             
-            # Format for YouTube API (ISO 8601)
-            scheduled_publish_time = scheduled_datetime.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-            
-            print(f"📅 Scheduled to publish: {scheduled_datetime.strftime('%Y-%m-%d at %H:%M')}")
-            
-            # Generate metadata
-            title = self.generate_title(video_file)
-            description = self.generate_description(video_file)
-            tags = self.generate_hashtags()
-            
-            # Upload with scheduled time
-            video_id = self.upload_scheduled_video(
-                video_path=video_path,
-                title=title,
-                description=description,
-                tags=tags,
-                scheduled_time=scheduled_publish_time
-            )
-            
-            if video_id:
-                # Move to uploaded folder
-                self.move_to_uploaded(video_file)
-                uploaded_count += 1
+            jobs.append({
+                'file': video_file,
+                'path': video_path,
+                'scheduled': scheduled_datetime,
+                # Format for YouTube API (ISO 8601)
+                'publish_at': scheduled_datetime.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                'title': self.generate_title(video_file),
+                'description': self.generate_description(video_file),
+                'tags': self.generate_hashtags(),
+            })
+        
+        workers = max(1, min(int(self.parallel_uploads), len(jobs)))
+        if workers > 1:
+            print(f"⚡ Uploading {len(jobs)} videos, {workers} at a time")
+        
+        self._quota_exceeded.clear()
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.upload_job, job): job for job in jobs}
+            # Finished uploads are recorded and moved here, one at a time, while
+            # the rest keep uploading
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    video_id = future.result()
+                except Exception as e:
+                    print(f"❌ Upload Error ({job['file'][:50]}): {e}")
+                    video_id = None
                 
-                print(f"✅ SUCCESS: Video uploaded and scheduled!")
-                print(f"   Video ID: {video_id}")
-                print(f"   Will publish: {scheduled_datetime.strftime('%Y-%m-%d at %H:%M')}")
-                print(f"   URL: https://www.youtube.com/watch?v={video_id}")
-            else:
-                failed_count += 1
-                print(f"❌ FAILED: Could not upload video")
+                if video_id:
+                    # Move to uploaded folder
+                    self.record_upload(job['file'])
+                    self.move_to_uploaded(job['file'])
+                    result = 'uploaded'
+                    
+                    print(f"✅ SUCCESS: {job['file'][:50]} uploaded and scheduled!")
+                    print(f"   Video ID: {video_id}")
+                    print(f"   Will publish: {job['scheduled'].strftime('%Y-%m-%d at %H:%M')}")
+                    print(f"   URL: https://www.youtube.com/watch?v={video_id}")
+                elif job.get('skipped'):
+                    result = 'skipped (quota)'
+                else:
+                    result = 'failed'
+                    print(f"❌ FAILED: Could not upload {job['file'][:50]}")
+                results.append((job, result, video_id))
+        
+        uploaded_count = sum(1 for _, result, _ in results if result == 'uploaded')
+        skipped_count = sum(1 for _, result, _ in results if result.startswith('skipped'))
+        failed_count = len(results) - uploaded_count - skipped_count
+        
+        print(f"\n{'='*70}")
+        print("📋 RESULTS PER VIDEO")
+        print(f"{'='*70}")
+        for job, result, video_id in sorted(results, key=lambda r: r[0]['scheduled']):
+            icon = '✅' if result == 'uploaded' else '⏭️' if result.startswith('skipped') else '❌'
+            print(f"{icon} {job['file'][:40]:<40} {job['scheduled'].strftime('%Y-%m-%d %H:%M')}  "
+                  f"{video_id or result}")
+        if self._quota_exceeded.is_set():
+            print("⚠ YouTube API quota ran out during this run; skipped videos stay in the queue.")
         
         # Final summary
         print(f"\n{'='*70}")
@@ -730,6 +817,8 @@ class YouTubeManager:
         print(f"{'='*70}")
         print(f"✅ Successfully uploaded and scheduled: {uploaded_count} videos")
         print(f"❌ Failed uploads: {failed_count} videos")
+        if skipped_count:
+            print(f"⏭️  Skipped (quota): {skipped_count} videos, left in the videos folder")
         print(f"📁 Uploaded videos moved to: {self.uploaded_folder}/")
         
         if uploaded_count > 0:
@@ -745,10 +834,35 @@ class YouTubeManager:
         
         print(f"{'='*70}\n")
         
-        return uploaded_count, failed_count
+        return uploaded_count, failed_count, skipped_count
+
+    def upload_job(self, job):
+        """Upload one prepared job on this thread's own service; None if it failed or was skipped"""
+        if self._quota_exceeded.is_set():
+            job['skipped'] = True
+            return None
+        
+        print(f"\n{'#'*60}")
+        print(f"Processing: {job['file'][:50]}...")
+        print(f"📅 Scheduled to publish: {job['scheduled'].strftime('%Y-%m-%d at %H:%M')}")
+        print(f"{'#'*60}")
+        
+        youtube = self.youtube if self.parallel_uploads <= 1 else self.get_thread_service()
+        return self.upload_scheduled_video(
+            video_path=job['path'],
+            title=job['title'],
+            description=job['description'],
+            tags=job['tags'],
+            scheduled_time=job['publish_at'],
+            youtube=youtube
+        )
+
+    def upload_scheduled_video(self, video_path, title, description, tags, scheduled_time, category_id=None,
+                               youtube=None):
+        """Upload video to YouTube with scheduled publish time (youtube: service to use, default self.youtube)"""
+        from googleapiclient.http import MediaFileUpload  # type: ignore
+        from googleapiclient.errors import HttpError  # type: ignore
 
-    def upload_scheduled_video(self, video_path, title, description, tags, scheduled_time, category_id=None):
-        """Upload video to YouTube with scheduled publish time"""
         # Use config defaults if not specified
         if category_id is None:
             category_id = config.VIDEO_CATEGORY_ID
@@ -784,7 +898,7 @@ class YouTubeManager:
             )
             
             # Execute upload with progress
-            request = self.youtube.videos().insert(
+            request = (youtube or self.youtube).videos().insert(
                 part='snippet,status',
                 body=body,
                 media_body=media
@@ -795,13 +909,15 @@ class YouTubeManager:
                 status, response = request.next_chunk()
                 if status:
                     progress = int(status.progress() * 100)
-                    print(f"📤 Upload progress: {progress}%")
+                    print(f"📤 Upload progress ({os.path.basename(video_path)[:30]}): {progress}%")
             
             video_id = response['id']
             
             return video_id
         
         except HttpError as error:
+            if is_quota_error(error):
+                self._quota_exceeded.set()
             print(f"❌ YouTube API Error: {error}")
             return None
         except Exception as e:
@@ -810,6 +926,8 @@ class YouTubeManager:
 
     def check_quota_status(self):
         """Check current YouTube API quota status"""
+        from googleapiclient.errors import HttpError  # type: ignore
+
         try:
             # Try to make a simple API call to check quota
             request = self.youtube.channels().list(
@@ -823,7 +941,7 @@ class YouTubeManager:
             return True
             
         except HttpError as e:
-            if 'quotaExceeded' in str(e):
+            if is_quota_error(e):
                 print("❌ YouTube API Quota Exceeded!")
                 print("   Your daily quota limit has been reached.")
                 print("   ")
@@ -846,6 +964,8 @@ class YouTubeManager:
 
 def setup_schedule(uploader, upload_times):
     """Schedule uploads at specific times"""
+    import schedule
+
     print("\n" + "="*60)
     print("Setting up upload schedule...")
     print("="*60)
@@ -868,7 +988,8 @@ def main():
     # Initialize uploader
     uploader = YouTubeManager(
         credentials_file=config.CREDENTIALS_FILE,
-        videos_folder=config.VIDEOS_FOLDER
+        videos_folder=config.VIDEOS_FOLDER,
+        parallel_uploads=config.UPLOAD_PARALLEL
     )
     uploader.uploaded_folder = config.UPLOADED_FOLDER
     uploader.token_file = config.TOKEN_FILE
@@ -880,11 +1001,13 @@ def main():
         print("✅ Authentication successful!\n")
         
         # Upload and schedule all videos
-        uploaded, failed = uploader.upload_and_schedule_all_videos()
+        uploaded, failed, skipped = uploader.upload_and_schedule_all_videos()
         
         if uploaded > 0:
             print("🎊 SUCCESS! All videos have been uploaded and scheduled.")
             print("🎬 You can now close this program - videos will publish automatically!")
+        elif skipped > 0:
+            print("⚠️ No videos were uploaded: the YouTube API quota ran out. Try again after it resets.")
         else:
             print("⚠️ No videos were uploaded. Please check your videos folder.")
             
@@ -0,0 +1,274 @@
+import time
+import queue
+import subprocess
+import threading
+from collections import deque
+
+from progress import YTDLP_PROGRESS_TEMPLATE, make_event, parse_progress_line
+
+# Headers to avoid blocks (shared by both engines)
+YTDLP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Capability probes run once per process and are cached here
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+
+def ytdlp_module_available():
+    with _probe_lock:
+        if 'module' not in _probe_cache:
+            try:
+                import yt_dlp  # noqa: F401
+                _probe_cache['module'] = True
+            except ImportError:
+                _probe_cache['module'] = False
+        return _probe_cache['module']
+
+
+def ytdlp_binary_available():
+    with _probe_lock:
+        if 'binary' not in _probe_cache:
+            try:
+                result = subprocess.run(
+                    ['yt-dlp', '--version'],
+                    capture_output=True,
+                    text=True,
+                    check=False
+                )
+                _probe_cache['binary'] = result.returncode == 0
+            except FileNotFoundError:
+                _probe_cache['binary'] = False
+        return _probe_cache['binary']
+
+
+class SubprocessEngine:
+    """Runs a fresh yt-dlp process per URL (the original behaviour).
+
+    Output is read line by line while yt-dlp runs: progress lines become
+    events on progress_bus, and a download that makes no progress for
+    stall_timeout seconds is killed instead of hanging the worker.
+    """
+
+    name = 'subprocess'
+
+    def __init__(self, progress_bus=None, stall_timeout=60):
+        self.progress_bus = progress_bus
+        self.stall_timeout = stall_timeout
+
+    def is_available(self):
+        return ytdlp_binary_available()
+
+    def build_command(self, url, output_template):
+        # yt-dlp command optimized for Meta AI and general video downloads
+        command = [
+            'yt-dlp',
+            url,
+            '-o', output_template,
+
+            # Format options
+            '--format', 'best',  # Download best quality
+            '--merge-output-format', 'mp4',  # Convert to mp4
+
+            # Download options
+            '--no-playlist',  # Don't download playlists
+            '--no-warnings',  # Reduce noise
+
+            # Progress display
+            '--newline',  # Better progress output
+            '--progress-template', YTDLP_PROGRESS_TEMPLATE,  # One JSON line per update
+
+            # Network options
+            '--socket-timeout', '30',
+            '--retries', '3',
+        ]
+
+        # Headers to avoid blocks
+        for name, value in YTDLP_HEADERS.items():
+            command += ['--add-header', f'{name}:{value}']
+
+        command += [
+            # Cookies (helpful for some sites)
+            '--no-check-certificates',
+
+            # Metadata
+            '--embed-metadata',  # Embed metadata in video
+        ]
+        return command
+
+    def download(self, url, output_template):
+        """Returns (returncode, error_output)"""
+        process = subprocess.Popen(
+            self.build_command(url, output_template),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        lines = queue.Queue()
+        threading.Thread(target=self._pump, args=(process.stdout, lines), daemon=True).start()
+
+        # Keep only the tail of non-progress output for error reporting
+        output = deque(maxlen=50)
+        last_activity = time.monotonic()
+        last_bytes = None
+        stalled = False
+
+        while True:
+            try:
+                line = lines.get(timeout=1)
+            except queue.Empty:
+                line = ''
+            if line is None:
+                break
+
+            info = parse_progress_line(line) if line else None
+            if info is not None:
+                if info.get('downloaded_bytes') != last_bytes:
+                    last_bytes = info.get('downloaded_bytes')
+                    last_activity = time.monotonic()
+                self._publish(url, info)
+            elif line.strip():
+                output.append(line.rstrip())
+                last_activity = time.monotonic()
+
+            if self.stall_timeout and time.monotonic() - last_activity > self.stall_timeout:
+                stalled = True
+                process.kill()
+                output.append(f'ERROR: Download stalled (no progress for {self.stall_timeout}s), killed')
+                self._publish(url, {'status': 'stalled', 'downloaded_bytes': last_bytes})
+                break
+
+        returncode = process.wait()
+        if stalled and returncode == 0:
+            returncode = 1
+        return returncode, '\n'.join(output)
+
+    def _pump(self, stream, lines):
+        for line in stream:
+            lines.put(line)
+        stream.close()
+        lines.put(None)
+
+    def _publish(self, url, info):
+        if self.progress_bus:
+            self.progress_bus.publish(make_event(url, self.name, info))
+
+
+class _CaptureLogger:
+    """yt-dlp logger that keeps warnings/errors for the current job"""
+
+    def __init__(self):
+        self.lines = []
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        self.lines.append(msg)
+
+    def error(self, msg):
+        self.lines.append(msg)
+
+
+class ApiEngine:
+    """Drives yt-dlp through its Python API with a long-lived YoutubeDL.
+
+    Interpreter startup and extractor imports are paid once per process
+    instead of once per URL. YoutubeDL is not thread-safe, so each worker
+    thread keeps its own instance.
+
+    There is no process to kill, so stalls are caught in two places: the
+    progress hook aborts a download whose byte count hasn't moved for
+    stall_timeout seconds, and the socket timeout is capped at
+    stall_timeout so a connection that goes silent (and stops calling the
+    hook) errors out too.
+    """
+
+    name = 'api'
+
+    def __init__(self, progress_bus=None, stall_timeout=60):
+        self.progress_bus = progress_bus
+        self.stall_timeout = stall_timeout
+        self._local = threading.local()
+
+    def is_available(self):
+        return ytdlp_module_available()
+
+    def build_options(self, logger):
+        return {
+            'format': 'best',
+            'merge_output_format': 'mp4',
+            'noplaylist': True,
+            'no_warnings': True,
+            'quiet': True,
+            'noprogress': True,
+            'socket_timeout': min(30, self.stall_timeout) if self.stall_timeout else 30,
+            'retries': 3,
+            'http_headers': dict(YTDLP_HEADERS),
+            'nocheckcertificate': True,
+            'postprocessors': [{'key': 'FFmpegMetadata', 'add_metadata': True}],
+            'progress_hooks': [self._progress_hook],
+            'logger': logger,
+        }
+
+    def _progress_hook(self, info):
+        # Called on the downloading thread, so the job's state is in self._local
+        job = self._local
+        if info.get('downloaded_bytes') != job.last_bytes:
+            job.last_bytes = info.get('downloaded_bytes')
+            job.last_activity = time.monotonic()
+        elif (self.stall_timeout and info.get('status') == 'downloading'
+                and time.monotonic() - job.last_activity > self.stall_timeout):
+            from yt_dlp.utils import DownloadError
+            self._publish({'status': 'stalled', 'downloaded_bytes': job.last_bytes})
+            raise DownloadError(f'ERROR: Download stalled (no progress for {self.stall_timeout}s), aborted')
+        self._publish(info)
+
+    def _publish(self, info):
+        if self.progress_bus:
+            self.progress_bus.publish(make_event(getattr(self._local, 'url', None), self.name, info))
+
+    def _get_ydl(self):
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            from yt_dlp import YoutubeDL
+            logger = _CaptureLogger()
+            ydl = YoutubeDL(self.build_options(logger))
+            self._local.ydl = ydl
+            self._local.logger = logger
+        return ydl, self._local.logger
+
+    def download(self, url, output_template):
+        """Returns (returncode, error_output)"""
+        from yt_dlp.utils import DownloadError
+
+        ydl, logger = self._get_ydl()
+        logger.lines = []
+        self._local.url = url
+        self._local.last_bytes = None
+        self._local.last_activity = time.monotonic()
+        ydl.params['outtmpl'] = {'default': output_template}
+        try:
+            returncode = ydl.download([url])
+        except DownloadError as e:
+            # The logger usually saw the same message already
+            if str(e) not in logger.lines:
+                logger.lines.append(str(e))
+            returncode = 1
+        return returncode, '\n'.join(logger.lines)
+
+
+def get_engine(mode='auto', progress_bus=None, stall_timeout=60):
+    """Pick a download engine: 'api', 'subprocess' or 'auto' (API when importable)"""
+    if mode == 'subprocess':
+        return SubprocessEngine(progress_bus, stall_timeout)
+    if mode == 'api' or ytdlp_module_available():
+        return ApiEngine(progress_bus, stall_timeout)
+    return SubprocessEngine(progress_bus, stall_timeout)